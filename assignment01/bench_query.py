@@ -0,0 +1,65 @@
+# Benjamin Zignego
+# per query overhead: Graph loaded once and queried in process vs one search.py process per query
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from search import Graph
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="Route Query Benchmark",
+                                     description="Per query cost of the search library in process against running search.py once per query",
+                                     epilog="Benjamin Zignego")
+    parser.add_argument("-f", "--file", default=os.path.join(HERE, "cities_midwest.csv"), help="path to csv file containing nodes and distances")
+    parser.add_argument("-i", "--initial", default="La Crosse", help="node to start searching from")
+    parser.add_argument("-g", "--goal", default="Chicago", help="node to end search at")
+    parser.add_argument("-s", "--search", default="dijkstra", help="search algorithm to use")
+    parser.add_argument("-n", "--queries", type=int, default=1000, help="in process queries to time")
+    parser.add_argument("-p", "--processes", type=int, default=20, help="search.py processes to time")
+    parser.add_argument("-t", "--threads", type=int, default=4, help="threads sharing one Graph for the concurrent run")
+    args = parser.parse_args()
+
+    startTime = time.perf_counter()
+    graph = Graph.from_csv(args.file)
+    loadMs = (time.perf_counter() - startTime) * 1000
+    expected = graph.search(args.initial, args.goal, args.search).path
+
+    startTime = time.perf_counter()
+    for _ in range(args.queries):
+        graph.search(args.initial, args.goal, args.search)
+    inProcess = (time.perf_counter() - startTime) * 1000 / args.queries
+
+    # same queries from several threads at once; every one has to agree
+    def query(_):
+        return graph.search(args.initial, args.goal, args.search).path
+    startTime = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        paths = list(pool.map(query, range(args.queries)))
+    threaded = (time.perf_counter() - startTime) * 1000 / args.queries
+    if(any(path != expected for path in paths)):
+        print("error: threaded queries disagree")
+        sys.exit(1)
+
+    command = [sys.executable, os.path.join(HERE, "search.py"), "-f", args.file,
+               "-i", args.initial, "-g", args.goal, "-s", args.search]
+    startTime = time.perf_counter()
+    for _ in range(args.processes):
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    perProcess = (time.perf_counter() - startTime) * 1000 / args.processes
+
+    print(f"graph load (once):          {loadMs:10.3f} ms")
+    print(f"in process query:           {inProcess:10.3f} ms")
+    print(f"in process, {args.threads} threads:     {threaded:10.3f} ms/query")
+    print(f"search.py subprocess:       {perProcess:10.3f} ms/query")
+    print(f"subprocess / in process:    {perProcess / inProcess:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
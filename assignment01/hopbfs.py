@@ -0,0 +1,131 @@
+# Benjamin Zignego
+# hop count bfs a whole level at a time with numpy
+#
+# the graph is copied once into csr arrays (indptr/indices over integer node ids) and
+# every bfs level is a handful of array operations instead of a python loop per edge.
+# numpy is only needed for this module; search.py works without it
+
+try:
+    import numpy as np
+except ImportError:  # only the levelbfs / multi source modes need it
+    np = None
+
+
+def require_numpy():
+    if(np is None):
+        raise ImportError("numpy is required for level synchronous bfs (pip install numpy)")
+
+
+class CSRGraph:
+    """
+    Unweighted compressed sparse row copy of a graph dict (name -> {neighbor: dist}).
+    Build it once and query it as often as you like; it never changes.
+    """
+
+    def __init__(self, graph):
+        require_numpy()
+        self.names = list(graph)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        ids = self.ids
+        degree = np.fromiter((len(graph[name]) for name in self.names), dtype=np.int64, count=len(self.names))
+        self.indptr = np.zeros(len(self.names) + 1, dtype=np.int64)
+        np.cumsum(degree, out=self.indptr[1:])
+        self.indices = np.fromiter((ids[neighbor] for name in self.names for neighbor in graph[name]),
+                                   dtype=np.int64, count=int(self.indptr[-1]))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _edges_of(self, frontier):
+        # (source position in frontier, neighbor id) for every edge leaving the frontier
+        starts = self.indptr[frontier]
+        lengths = self.indptr[frontier + 1] - starts
+        total = int(lengths.sum())
+        owner = np.repeat(np.arange(len(frontier)), lengths)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return owner, self.indices[starts[owner] + offsets]
+
+    def hops(self, source, goal=None):
+        """
+        Hop counts from source to every node (-1 where unreachable) and the bfs parent of
+        each node (-1 for the source and unreached nodes). Stops early once goal is reached.
+        """
+        n = len(self.names)
+        dist = np.full(n, -1, dtype=np.int32)
+        parent = np.full(n, -1, dtype=np.int64)
+        visited = np.zeros(n, dtype=bool)
+        frontier = np.array([source], dtype=np.int64)
+        visited[source] = True
+        dist[source] = 0
+        level = 0
+        while len(frontier) and (goal is None or not visited[goal]):
+            level += 1
+            owner, neighbors = self._edges_of(frontier)
+            fresh = ~visited[neighbors]
+            neighbors = neighbors[fresh]
+            # duplicates just overwrite each other; any parent from the last level will do
+            parent[neighbors] = frontier[owner[fresh]]
+            frontier = np.unique(neighbors)
+            visited[frontier] = True
+            dist[frontier] = level
+        return dist, parent
+
+    def multi_source_hops(self, sources):
+        """
+        Hop counts from each of sources to every node, as a len(sources) x n array (-1 where
+        unreachable). Up to 64 sources share one traversal: every node carries a bitset of
+        the sources that have reached it, so each level is one pass over the frontier's edges.
+        """
+        n = len(self.names)
+        sources = np.asarray(sources, dtype=np.int64)
+        result = np.full((len(sources), n), -1, dtype=np.int32)
+        for first in range(0, len(sources), 64):
+            batch = sources[first:first + 64]
+            bits = np.left_shift(np.uint64(1), np.arange(len(batch), dtype=np.uint64))
+            seen = np.zeros(n, dtype=np.uint64)
+            np.bitwise_or.at(seen, batch, bits)
+            result[first + np.arange(len(batch)), batch] = 0
+            frontier = seen.copy()
+            active = np.unique(batch)
+            level = 0
+            while len(active):
+                level += 1
+                owner, neighbors = self._edges_of(active)
+                if(not len(neighbors)):
+                    break
+                carried = frontier[active][owner]
+                # or together everything arriving at the same node
+                order = np.argsort(neighbors, kind="stable")
+                neighbors = neighbors[order]
+                starts = np.flatnonzero(np.r_[True, neighbors[1:] != neighbors[:-1]])
+                targets = neighbors[starts]
+                arriving = np.bitwise_or.reduceat(carried[order], starts) & ~seen[targets]
+                keep = arriving != 0
+                active = targets[keep]
+                arriving = arriving[keep]
+                seen[active] |= arriving
+                frontier[active] = arriving
+                for j in range(len(batch)):
+                    reached = active[((arriving >> np.uint64(j)) & np.uint64(1)) != 0]
+                    result[first + j, reached] = level
+        return result
+
+
+# drop in for search(graph, start, goal, "bfs"): same result tuple, hop count as cost.
+# pass csr to reuse one already built for this graph
+def level_bfs(graph, start, goal, csr=None):
+    if(csr is None):
+        csr = CSRGraph(graph)
+    source = csr.ids[start]
+    target = csr.ids[goal]
+    dist, parent = csr.hops(source, target)
+    generated = int((dist >= 0).sum())
+    if(dist[target] < 0):
+        return None, float('inf'), generated, 0
+    path = []
+    node = target
+    while node >= 0:
+        path.append(csr.names[node])
+        node = parent[node]
+    path.reverse()
+    return path, float(dist[target]), generated, int((dist == dist[target]).sum())
@@ -5,12 +5,28 @@ import argparse
 import os
 import sys
 import heapq
+import threading
 import time
-from collections import defaultdict, deque # dark and evil double duty queue
+from collections import OrderedDict, defaultdict, deque, namedtuple # dark and evil double duty queue
+from itertools import count
+from shards import ShardedGraph
 
-def search(graph, start, goal, algo):
+# heuristic is a function node -> estimated distance left to goal (dijkstra becomes A*),
+# shared with the memory-bounded modes. memory caps the nodes smastar keeps, and stats
+# (a dict) gets expansion/re-expansion/peak memory counts from idastar and smastar, and
+# expansion/frontier push and pop counts from the others
+def search(graph, start, goal, algo, heuristic=None, memory=None, stats=None):
+    h = heuristic or (lambda node: 0.0)
     # evil string comparison
-    if(algo == "bfs"):
+    if(algo == "idastar"):
+        return ida_star(graph, start, goal, h, stats)
+    elif(algo == "smastar"):
+        return sma_star(graph, start, goal, h, memory or 10000, stats)
+    elif(algo == "levelbfs"):
+        # imported here so numpy only gets loaded by the modes that use it
+        from hopbfs import level_bfs
+        return level_bfs(graph, start, goal)
+    elif(algo == "bfs"):
         frontier = deque([(start, [start], 0.0)])
         pop = frontier.popleft
         push = frontier.append
@@ -19,23 +35,26 @@ def search(graph, start, goal, algo):
         pop = frontier.pop
         push = frontier.append
     elif(algo == "dijkstra" or not algo):
-        frontier = [(0.0, start, [start])]
+        frontier = [(h(start), 0.0, start, [start])]
         pop = lambda: heapq.heappop(frontier)
         push = lambda item: heapq.heappush(frontier, item)
     else:
-        print("error: invalid search algorithm")
-        sys.exit(1)
+        raise ValueError(f"invalid search algorithm '{algo}'")
 
     reached = {start: 0.0}
     nodes = 1  # start node
+    expanded = 0  # pops; every generated node past the start was one push
 
     while frontier:
         if(algo == "dijkstra"):
-            cost, node, path = pop()
+            _, cost, node, path = pop()
         else:
             node, path, cost = pop()
+        expanded += 1
 
         if(node == goal):
+            if(stats is not None):
+                stats.update(expansions=expanded, frontier_pops=expanded, frontier_pushes=nodes)
             return path, cost, nodes, len(frontier)
 
         for neighbor, dist in graph[node].items():
@@ -44,68 +63,866 @@ def search(graph, start, goal, algo):
                 reached[neighbor] = newCost
                 nodes += 1
                 if(algo == "dijkstra"):
-                    push((newCost, neighbor, path + [neighbor]))
+                    push((newCost + h(neighbor), newCost, neighbor, path + [neighbor]))
                 else:
                     push((neighbor, path + [neighbor], newCost))
 
+    if(stats is not None):
+        stats.update(expansions=expanded, frontier_pops=expanded, frontier_pushes=nodes)
     return None, float('inf'), nodes, len(frontier)
 
 
+INF = float('inf')
+
+
+# admissible (and consistent) heuristic for when we know nothing about where nodes are:
+# every edge is at least the shortest edge in the graph, so hops left times that is a
+# lower bound. costs one bfs back from the goal and a scan of every edge, and keeps a hop
+# count for every node that can reach the goal, so it is O(V) memory no matter what
+# search it feeds (it's not usable with the memory bounded, sharded -d graphs)
+def hop_heuristic(graph, goal):
+    shortest = min((dist for edges in graph.values() for dist in edges.values()), default=0.0)
+    hops = {goal: 0}
+    queue = deque([goal])
+    while queue:
+        node = queue.popleft()
+        for neighbor in graph[node]:
+            if(neighbor not in hops):
+                hops[neighbor] = hops[node] + 1
+                queue.append(neighbor)
+    # can't reach the goal at all -> INF, not INF * 0 (nan) when some edge has length 0
+    return lambda node: hops[node] * shortest if node in hops else INF
+
+
+# iterative deepening A*: depth first under an f bound that rises to the smallest f
+# that went over it, so memory is just the current path. returns the same tuple as
+# search(), with the path length as the "frontier". re-expansions are the expansions of
+# every iteration before the last one (each deeper pass walks the shallower tree again),
+# counted that way so the stat doesn't need a set of every node ever expanded
+def ida_star(graph, start, goal, h, stats=None):
+    nodes = 1
+    expansions = 0
+    lastIteration = 0  # expansions before the current iteration started
+    iterations = 0
+    peak = 1
+    bound = h(start)
+    found = None
+    while found is None and bound < INF:
+        iterations += 1
+        lastIteration = expansions
+        nextBound = INF
+        path = [start]
+        costs = [0.0]
+        onPath = {start}
+        if(start == goal):
+            found = 0.0
+            break
+        expansions += 1
+        stack = [iter(graph[start].items())]
+        while stack:
+            for neighbor, dist in stack[-1]:
+                if(neighbor in onPath):
+                    continue
+                nodes += 1
+                cost = costs[-1] + dist
+                f = cost + h(neighbor)
+                if(f > bound):
+                    nextBound = min(nextBound, f)
+                    continue
+                path.append(neighbor)
+                costs.append(cost)
+                if(neighbor == goal):
+                    found = cost
+                    break
+                onPath.add(neighbor)
+                expansions += 1
+                stack.append(iter(graph[neighbor].items()))
+                peak = max(peak, len(path))
+                break
+            else:
+                stack.pop()
+                onPath.discard(path.pop())
+                costs.pop()
+                continue
+            if(found is not None):
+                break
+        bound = nextBound
+
+    if(stats is not None):
+        stats.update(expansions=expansions, reexpansions=lastIteration,
+                     iterations=iterations, peak_memory=peak)
+    if(found is None):
+        return None, INF, nodes, 0
+    return path, found, nodes, len(path)
+
+
+class _SMANode:
+    __slots__ = ("state", "parent", "g", "f", "depth", "children", "forgotten", "expanded", "alive")
+
+    def __init__(self, state, parent, g, f):
+        self.state = state
+        self.parent = parent
+        self.g = g
+        self.f = f
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.children = []
+        self.forgotten = {}  # state -> f of successors dropped to save memory
+        self.expanded = False
+        self.alive = True
+
+    def open_key(self):
+        # a fresh node is worth its own f; an expanded one only for what it had to forget
+        if(not self.expanded):
+            return self.f
+        return min(self.forgotten.values(), default=INF)
+
+
+# simplified memory-bounded A* over loopless paths, keeping at most memory nodes (plus
+# one expansion's worth of successors while it makes room, which peak_memory counts).
+# when full it forgets the worst leaf (highest f, shallowest) and remembers its f in
+# the parent, so the parent gets re-expanded if that branch becomes the best again.
+# optimal whenever the cap leaves room for the best path
+def sma_star(graph, start, goal, h, memory, stats=None):
+    tie = count()
+    root = _SMANode(start, None, 0.0, h(start))
+    openHeap = [(root.f, 0, next(tie), root)]
+    leafHeap = []
+    used = 1
+    peak = 1
+    nodes = 1
+    expansions = 0
+    reexpansions = 0
+
+    def push_open(node):
+        key = node.open_key()
+        if(key < INF):
+            heapq.heappush(openHeap, (key, -node.depth, next(tie), node))
+
+    def push_leaf(node):
+        if(not node.children and node.parent is not None):
+            heapq.heappush(leafHeap, (-node.f, node.depth, next(tie), node))
+
+    # f of an expanded node is the best it still leads to; pass changes up the tree
+    def backup(node):
+        while node is not None and node.expanded:
+            f = min([child.f for child in node.children] + list(node.forgotten.values()), default=INF)
+            if(f == node.f):
+                break
+            node.f = f
+            push_leaf(node)
+            node = node.parent
+
+    def remove(node):
+        nonlocal used
+        node.alive = False
+        used -= 1
+        parent = node.parent
+        parent.children.remove(node)
+        if(node.f < INF):
+            parent.forgotten[node.state] = node.f
+        backup(parent)
+        push_open(parent)
+        push_leaf(parent)
+
+    found = None
+    while openHeap:
+        key, _, _, node = heapq.heappop(openHeap)
+        if(not node.alive or key != node.open_key()):
+            continue
+        if(node.state == goal):
+            found = node
+            break
+
+        expansions += 1
+        if(node.expanded):
+            reexpansions += 1
+            successors = node.forgotten
+            node.forgotten = {}
+        else:
+            onPath = set()
+            ancestor = node
+            while ancestor is not None:
+                onPath.add(ancestor.state)
+                ancestor = ancestor.parent
+            successors = {neighbor: 0.0 for neighbor in graph[node.state] if neighbor not in onPath}
+        node.expanded = True
+
+        added = []
+        for neighbor, oldF in successors.items():
+            g = node.g + graph[node.state][neighbor]
+            f = max(g + h(neighbor), node.f, oldF)
+            # no room left to go any deeper than this
+            if(neighbor != goal and node.depth + 2 >= memory):
+                f = INF
+            if(f == INF):
+                continue
+            child = _SMANode(neighbor, node, g, f)
+            node.children.append(child)
+            added.append(child)
+            nodes += 1
+        used += len(added)
+        peak = max(peak, used)
+        backup(node)
+        if(not node.children):
+            # dead end (or out of room): drop it for good
+            node.f = INF
+            if(node.parent is not None):
+                remove(node)
+            continue
+        for child in added:
+            push_open(child)
+            push_leaf(child)
+
+        while used > memory and leafHeap:
+            negF, _, _, leaf = heapq.heappop(leafHeap)
+            if(leaf.alive and not leaf.children and -negF == leaf.f):
+                remove(leaf)
+
+    if(stats is not None):
+        stats.update(expansions=expansions, reexpansions=reexpansions, peak_memory=peak)
+    if(found is None):
+        return None, INF, nodes, 0
+    path = []
+    node = found
+    while node is not None:
+        path.append(node.state)
+        node = node.parent
+    path.reverse()
+    waiting = sum(1 for key, _, _, node in openHeap if node.alive and key == node.open_key())
+    return path, found.g, nodes, waiting
+
+
+# updates are (op, city1, city2, dist) tuples, op one of insert/delete/reweight
+# (dist is None for delete). edges are undirected so both directions change.
+# returns what actually changed as (city1, city2, oldDist, newDist), None meaning no edge.
+# a batch is all or nothing: if any update is bad, the ones before it are undone and the
+# graph is left as it was before the call
+def apply_updates(graph, updates):
+    changes = []
+    added = []  # nodes this batch created
+    try:
+        for op, a, b, dist in updates:
+            old = graph[a].get(b) if a in graph else None
+            if(op == "delete"):
+                if(old is None):
+                    continue
+                del graph[a][b]
+                del graph[b][a]
+            elif(op == "insert" or op == "reweight"):
+                if(op == "reweight" and old is None):
+                    raise ValueError(f"can't reweight missing edge {a} - {b}")
+                if(dist < 0):
+                    raise ValueError(f"negative distance for {a} - {b}")
+                if(dist == old):
+                    continue
+                added += [node for node in (a, b) if node not in graph]
+                graph.setdefault(a, {})[b] = dist
+                graph.setdefault(b, {})[a] = dist
+            else:
+                raise ValueError(f"unknown update '{op}'")
+            changes.append((a, b, old, None if op == "delete" else dist))
+    except Exception:
+        # walk it back newest first so an edge touched twice ends at its original weight
+        for a, b, old, new in reversed(changes):
+            if(old is None):
+                del graph[a][b]
+                del graph[b][a]
+            else:
+                graph[a][b] = old
+                graph[b][a] = old
+        for node in added:
+            if(node in graph and not graph[node]):
+                del graph[node]
+        raise
+    return changes
+
+
+# update file: one "op, city1, city2[, dist]" per line, blank lines separate batches
+def read_updates(filepath):
+    batches = [[]]
+    with open(filepath) as updatefile:
+        for line in updatefile:
+            line = line.strip()
+            if(not line):
+                if(batches[-1]):
+                    batches.append([])
+                continue
+            if(line.startswith("#")):
+                continue
+            tokens = [token.strip() for token in line.split(",")]
+            op = tokens[0].lower()
+            if(op == "delete" and len(tokens) == 3):
+                dist = None
+            elif(op in ("insert", "reweight") and len(tokens) == 4):
+                dist = float(tokens[3])
+            else:
+                raise ValueError(f"bad update line: {line}")
+            batches[-1].append((op, tokens[1], tokens[2], dist))
+    return [batch for batch in batches if batch]
+
+
+class ShortestPathTree:
+    """
+    Dijkstra distances and parents from one source to every node, kept correct as
+    edges change. update() only re-searches what a batch can affect (Ramalingam-Reps):
+    nodes hanging below a lengthened or deleted tree edge are cut loose and re-settled
+    from their unaffected neighbors, and shortened or inserted edges push their
+    improvement outward. Everything else keeps its distance.
+    """
 
-parser = argparse.ArgumentParser(prog="Python Route Search",
-                                 description="Compare algorithms to search for the least cost path between 2 nodes in a given file",
-                                 epilog="10/12/2025 Benjamin Zignego")
-parser.add_argument("-f", "--file", help="path to csv file containing nodes and distances")
-parser.add_argument("-i", "--initial", help="node to start searching from")
-parser.add_argument("-g", "--goal", help="node to end search at")
-parser.add_argument("-s", "--search", default="dijkstra", help="search algorithm to use")
-
-args = parser.parse_args()
-filepath = args.file
-start = args.initial
-goal = args.goal
-algo = args.search
-
-if(not os.path.isfile(filepath)):
-    print("error: invalid filepath")
-    sys.exit(1)
-elif(not filepath or not start or not goal):
-    print("error: invalid arg or incorrect number of args")
-    sys.exit(1)
-
-datafile = open(filepath)
-graph = defaultdict(dict)
-
-# hideous python for loop of doom and destruction
-# i miss my curly brackets and parentheses :(
-for line in datafile:
-    line = line.strip()
-    if(line and not line.startswith("#")):
-        city1, city2, dist = [token.strip() for token in line.split(",")]
-        # python dict yippee yay wow
-        dist = float(dist)
-        graph[city1][city2] = dist
-        graph[city2][city1] = dist
-
-if(start not in graph or goal not in graph):
-    print("error: start or goal not in given data");
-    sys.exit(1)
-
-startTime = time.time()
-path, cost, nodes, size = search(graph, start, goal, algo)
-endTime = time.time()
-
-if(path):
-    print("Route found:", " -> ".join(path))
-    if(algo == "dijkstra"):
-        print("Distance:", round(cost, 1), "miles")
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+        self.dist = {}
+        self.parent = {}
+        self.children = defaultdict(set)
+        self.settled = 0  # nodes given a (new) distance by the last build/update
+        self._tie = 0
+        self._settle([self._entry(0.0, source, None)])
+
+    def _entry(self, cost, node, parent):
+        # the counter keeps the heap from ever comparing parents
+        self._tie += 1
+        return (cost, self._tie, node, parent)
+
+    def _settle(self, heap):
+        heapq.heapify(heap)
+        dist = self.dist
+        parent = self.parent
+        children = self.children
+        settled = 0
+        while heap:
+            cost, _, node, par = heapq.heappop(heap)
+            if(cost >= dist.get(node, INF)):
+                continue
+            old = parent.get(node)
+            if(old is not None):
+                children[old].discard(node)
+            dist[node] = cost
+            parent[node] = par
+            if(par is not None):
+                children[par].add(node)
+            settled += 1
+            for neighbor, d in self.graph[node].items():
+                if(cost + d < dist.get(neighbor, INF)):
+                    heapq.heappush(heap, self._entry(cost + d, neighbor, node))
+        self.settled = settled
+
+    def update(self, changes):
+        """Repair the tree after apply_updates() returned changes."""
+        dist = self.dist
+        parent = self.parent
+        children = self.children
+
+        # a longer or missing tree edge can only hurt the subtree below it
+        affected = set()
+        for a, b, old, new in changes:
+            if(new is not None and (old is None or new < old)):
+                continue
+            for u, v in ((a, b), (b, a)):
+                if(parent.get(v) == u):
+                    stack = [v]
+                    while stack:
+                        node = stack.pop()
+                        if(node not in affected):
+                            affected.add(node)
+                            stack.extend(children[node])
+        for node in affected:
+            old = parent.pop(node)
+            children[old].discard(node)
+            del dist[node]
+
+        # re-enter the cut subtree from whatever is still settled around it
+        heap = []
+        for node in affected:
+            for neighbor, d in self.graph[node].items():
+                if(neighbor in dist):
+                    heap.append(self._entry(dist[neighbor] + d, node, neighbor))
+        # and let shorter edges pull their far end (and what hangs off it) closer.
+        # read the weight back from the graph: a later update in the batch may have won
+        for a, b, old, new in changes:
+            if(new is None or (old is not None and new >= old)):
+                continue
+            for u, v in ((a, b), (b, a)):
+                d = self.graph[u].get(v)
+                if(d is not None and u in dist and dist[u] + d < dist.get(v, INF)):
+                    heap.append(self._entry(dist[u] + d, v, u))
+        self._settle(heap)
+
+    def path_to(self, goal):
+        """(path, cost) from the source to goal, or (None, inf) if it can't be reached."""
+        if(goal not in self.dist):
+            return None, INF
+        path = []
+        node = goal
+        while node is not None:
+            path.append(node)
+            node = self.parent[node]
+        path.reverse()
+        return path, self.dist[goal]
+
+
+
+# A* from spur to goal skipping blocked nodes and (from, to) edges. h is the distance
+# to goal in the unblocked graph (a goal-rooted ShortestPathTree), which blocking can
+# only lengthen, so it never overestimates and usually walks straight down the tree
+def spur_search(graph, spur, goal, h, blockedNodes, blockedEdges):
+    if(spur not in h):
+        return None, INF
+    frontier = [(h[spur], 0.0, spur)]
+    best = {spur: 0.0}
+    parent = {spur: None}
+    while frontier:
+        _, cost, node = heapq.heappop(frontier)
+        if(cost > best[node]):
+            continue
+        if(node == goal):
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parent[node]
+            path.reverse()
+            return path, cost
+        for neighbor, dist in graph[node].items():
+            if(neighbor in blockedNodes or neighbor not in h or (node, neighbor) in blockedEdges):
+                continue
+            newCost = cost + dist
+            if(newCost < best.get(neighbor, INF)):
+                best[neighbor] = newCost
+                parent[neighbor] = node
+                heapq.heappush(frontier, (newCost + h[neighbor], newCost, neighbor))
+    return None, INF
+
+
+# Yen's k shortest loopless paths from start to goal, yielded as (path, cost) cheapest
+# first so the caller can time each one. One goal-rooted tree serves as the heuristic
+# for every spur search (pass tree to reuse one), and the candidate heap is shared
+# across rounds and trimmed to the number of paths still wanted
+def k_shortest_paths(graph, start, goal, k, tree=None):
+    if(tree is None):
+        tree = ShortestPathTree(graph, goal)
+    h = tree.dist
+    path, cost = tree.path_to(start)
+    if(path is None or k < 1):
+        return
+    path.reverse()
+    found = [(path, cost)]
+    yield path, cost
+
+    candidates = []
+    seen = {tuple(path)}
+    while len(found) < k:
+        prev = found[-1][0]
+        rootCost = 0.0
+        for i in range(len(prev) - 1):
+            spur = prev[i]
+            root = prev[:i + 1]
+            blockedEdges = {(p[i], p[i + 1]) for p, _ in found if len(p) > i + 1 and p[:i + 1] == root}
+            spurPath, spurCost = spur_search(graph, spur, goal, h, set(root[:-1]), blockedEdges)
+            if(spurPath is not None):
+                total = root[:-1] + spurPath
+                if(tuple(total) not in seen):
+                    seen.add(tuple(total))
+                    heapq.heappush(candidates, (rootCost + spurCost, total))
+            rootCost += graph[prev[i]][prev[i + 1]]
+
+        # only the best (k - found) candidates can ever be used
+        wanted = k - len(found)
+        if(len(candidates) > 2 * wanted):
+            candidates = heapq.nsmallest(wanted, candidates)
+        if(not candidates):
+            return
+        cost, path = heapq.heappop(candidates)
+        found.append((path, cost))
+        yield path, cost
+
+
+
+# one dijkstra from start that stops at whichever of goals it settles first.
+# returns (goal, path, cost, nodes generated, frontier size); goal is None if none reachable
+def nearest_goal(graph, start, goals):
+    goals = set(goals)
+    frontier = [(0.0, start, None)]
+    parent = {}
+    reached = {start: 0.0}
+    nodes = 1
+    while frontier:
+        cost, node, par = heapq.heappop(frontier)
+        if(node in parent):
+            continue
+        parent[node] = par
+        if(node in goals):
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parent[node]
+            path.reverse()
+            return path[-1], path, cost, nodes, len(frontier)
+        for neighbor, dist in graph[node].items():
+            newCost = cost + dist
+            if(newCost < reached.get(neighbor, INF)):
+                reached[neighbor] = newCost
+                nodes += 1
+                heapq.heappush(frontier, (newCost, neighbor, node))
+    return None, None, INF, nodes, 0
+
+
+# the reverse: one dijkstra seeded with every facility at distance 0 labels each node
+# with its closest facility. returns dict node -> (facility, distance) for every node
+# some facility can reach
+def assign_facilities(graph, facilities):
+    frontier = [(0.0, facility, facility) for facility in set(facilities)]
+    heapq.heapify(frontier)
+    assigned = {}
+    while frontier:
+        cost, node, facility = heapq.heappop(frontier)
+        if(node in assigned):
+            continue
+        assigned[node] = (facility, cost)
+        for neighbor, dist in graph[node].items():
+            if(neighbor not in assigned):
+                heapq.heappush(frontier, (cost + dist, neighbor, facility))
+    return assigned
+
+
+# assignment table as csv: node, facility, distance
+def write_assignments(filepath, assigned):
+    with open(filepath, "w") as out:
+        out.write("# node, nearest facility, distance\n")
+        for node, (facility, cost) in assigned.items():
+            out.write(f"{node}, {facility}, {cost}\n")
+
+
+# one name per line, # comments and blank lines skipped
+def read_names(filepath):
+    with open(filepath) as namefile:
+        return [line.strip() for line in namefile if line.strip() and not line.strip().startswith("#")]
+
+
+# csv of "name1, name2, distance" lines (undirected) -> dict name -> {neighbor: distance}
+def load_graph(filepath):
+    graph = defaultdict(dict)
+    with open(filepath) as datafile:
+        # hideous python for loop of doom and destruction
+        # i miss my curly brackets and parentheses :(
+        for line in datafile:
+            line = line.strip()
+            if(line and not line.startswith("#")):
+                city1, city2, dist = [token.strip() for token in line.split(",")]
+                # python dict yippee yay wow
+                dist = float(dist)
+                graph[city1][city2] = dist
+                graph[city2][city1] = dist
+    # plain dict from here on so a lookup can never quietly add a node
+    return dict(graph)
+
+
+SearchResult = namedtuple("SearchResult", ["path", "cost", "nodes", "frontier", "ms", "stats"])
+
+
+class Graph:
+    """
+    A road graph loaded once and queried as many times as you like. Queries only read
+    the adjacency, so any number of threads can run them at once; the extras built on
+    first use (the csr copy for levelbfs, goal-rooted trees for k paths) are made under
+    a lock. apply_updates() is the one writer and must not overlap with queries.
+    """
+
+    MAX_TREES = 16  # goal-rooted trees kept for k_shortest_paths
+
+    def __init__(self, adjacency):
+        self.adjacency = adjacency
+        self._lock = threading.Lock()
+        self._csr = None
+        self._trees = OrderedDict()  # goal -> ShortestPathTree, most recently used last
+
+    @classmethod
+    def from_csv(cls, filepath):
+        return cls(load_graph(filepath))
+
+    @classmethod
+    def from_shards(cls, dirpath, resident=8):
+        return cls(ShardedGraph(dirpath, resident))
+
+    def __contains__(self, node):
+        return node in self.adjacency
+
+    def __len__(self):
+        return len(self.adjacency)
+
+    def csr(self):
+        """CSRGraph copy for the numpy modes (needs numpy), built once."""
+        if(self._csr is None):
+            with self._lock:
+                if(self._csr is None):
+                    from hopbfs import CSRGraph
+                    self._csr = CSRGraph(self.adjacency)
+        return self._csr
+
+    def hop_heuristic(self, goal):
+        return hop_heuristic(self.adjacency, goal)
+
+    def search(self, start, goal, algo="dijkstra", heuristic=None, memory=None):
+        """Same modes as search(); returns a SearchResult with the time taken in ms."""
+        stats = {}
+        startTime = time.perf_counter()
+        if(algo == "levelbfs"):
+            from hopbfs import level_bfs
+            path, cost, nodes, size = level_bfs(self.adjacency, start, goal, self.csr())
+        else:
+            path, cost, nodes, size = search(self.adjacency, start, goal, algo, heuristic, memory, stats)
+        ms = (time.perf_counter() - startTime) * 1000
+        return SearchResult(path, cost, nodes, size, ms, stats)
+
+    def _tree_to(self, goal):
+        with self._lock:
+            tree = self._trees.get(goal)
+            if(tree is None):
+                tree = self._trees[goal] = ShortestPathTree(self.adjacency, goal)
+                if(len(self._trees) > Graph.MAX_TREES):
+                    self._trees.popitem(last=False)
+            else:
+                self._trees.move_to_end(goal)
+            return tree
+
+    def nearest(self, start, goals):
+        """(goal, path, cost, nodes, frontier) for the closest of goals; see nearest_goal()."""
+        return nearest_goal(self.adjacency, start, goals)
+
+    def assign(self, facilities):
+        """node -> (nearest facility, distance); see assign_facilities()."""
+        return assign_facilities(self.adjacency, facilities)
+
+    def k_shortest_paths(self, start, goal, k):
+        """Generator of (path, cost), cheapest first; see k_shortest_paths()."""
+        return k_shortest_paths(self.adjacency, start, goal, k, self._tree_to(goal))
+
+    def apply_updates(self, updates):
+        """Change edges (see apply_updates()); cached goal trees are repaired, the csr copy is rebuilt on next use."""
+        if(isinstance(self.adjacency, ShardedGraph)):
+            raise ValueError("a sharded graph is read only")
+        with self._lock:
+            changes = apply_updates(self.adjacency, updates)
+            if(changes):
+                self._csr = None
+                for tree in self._trees.values():
+                    tree.update(changes)
+            return changes
+
+    def close(self):
+        if(isinstance(self.adjacency, ShardedGraph)):
+            self.adjacency.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="Python Route Search",
+                                     description="Compare algorithms to search for the least cost path between 2 nodes in a given file",
+                                     epilog="10/12/2025 Benjamin Zignego")
+    parser.add_argument("-f", "--file", help="path to csv file containing nodes and distances")
+    parser.add_argument("-d", "--shards", help="directory written by shards.py to search instead of a csv file; shards are paged in as the search reaches them")
+    parser.add_argument("--resident", type=int, default=8, help="most shards kept mapped at once with -d")
+    parser.add_argument("-i", "--initial", help="node to start searching from")
+    parser.add_argument("-g", "--goal", help="node to end search at, or comma separated nodes to find the nearest of in one search")
+    parser.add_argument("-G", "--goals_file", help="file of goal nodes, one per line (added to -g)")
+    parser.add_argument("-a", "--assign", help="label every node with its nearest goal (facility) in one pass and write the table to this csv file")
+    parser.add_argument("-s", "--search", default="dijkstra", help="search algorithm to use (bfs, dfs, dijkstra, idastar, smastar, levelbfs)")
+    parser.add_argument("--heuristic", choices=["none", "hops"], default="none", help="heuristic for dijkstra (making it A*), idastar and smastar: none, or hops to goal times the shortest edge (a bfs over the whole graph, so not with -d)")
+    parser.add_argument("-M", "--memory", type=int, default=10000, help="most nodes smastar may keep in memory at once")
+    parser.add_argument("--multi_source", help="comma separated nodes: hop counts from all of them to the goal (and to every node) in one level synchronous pass, needs numpy")
+    parser.add_argument("-k", "--k_paths", type=int, help="also list the k shortest loopless routes (Yen's algorithm) with the time each one took")
+    parser.add_argument("-u", "--updates", help="file of edge insert/delete/reweight batches to apply after the search, repairing the route after each batch")
+    # the shared --profile/--metrics layer lives at the repo root; only the cli needs it, so
+    # importing search.py as a library doesn't touch sys.path
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import instrument
+    instrument.add_arguments(parser)
+
+    args = parser.parse_args(argv)
+    with instrument.session(args, "search") as metrics:
+        run(args, metrics)
+
+
+def run(args, metrics):
+    filepath = args.file
+    start = args.initial
+    algo = args.search
+    goals = [token.strip() for token in (args.goal or "").split(",") if token.strip()]
+    if(args.goals_file):
+        if(not os.path.isfile(args.goals_file)):
+            print("error: invalid goals filepath")
+            sys.exit(1)
+        goals += read_names(args.goals_file)
+    goals = list(dict.fromkeys(goals))
+    goal = goals[0] if len(goals) == 1 else None
+
+    if(args.shards):
+        if(not os.path.isfile(os.path.join(args.shards, "index.bin"))):
+            print("error: invalid shard directory")
+            sys.exit(1)
+        elif(args.updates):
+            print("error: a sharded graph is read only, can't apply updates")
+            sys.exit(1)
+        elif(args.heuristic == "hops"):
+            print("error: --heuristic hops walks the whole graph up front, it doesn't work with -d")
+            sys.exit(1)
+    elif(not filepath or not os.path.isfile(filepath)):
+        print("error: invalid filepath")
+        sys.exit(1)
+    if(not goals or (not start and not args.assign)):
+        print("error: invalid arg or incorrect number of args")
+        sys.exit(1)
+    elif(goal is None and not args.assign and (algo != "dijkstra" or args.k_paths or args.updates
+                                                or args.multi_source or args.heuristic != "none")):
+        print("error: several goals only work with a plain dijkstra search")
+        sys.exit(1)
+    elif(args.updates and not os.path.isfile(args.updates)):
+        print("error: invalid updates filepath")
+        sys.exit(1)
+
+    if(args.shards):
+        graph = Graph.from_shards(args.shards, args.resident)
+    else:
+        graph = Graph.from_csv(filepath)
+
+    if((start and start not in graph) or any(g not in graph for g in goals)):
+        print("error: start or goal not in given data");
+        sys.exit(1)
+
+    if(args.assign):
+        startTime = time.time()
+        assigned = graph.assign(goals)
+        endTime = time.time()
+        write_assignments(args.assign, assigned)
+        print(f"{len(assigned)} of {len(graph)} nodes assigned to {len(goals)} facilities, written to {args.assign}")
+        if(start):
+            facility, cost = assigned.get(start, (None, INF))
+            print(f"Nearest facility to {start}: {facility} ({round(cost, 1)} miles)" if facility else f"No facility reaches {start}")
+        print(f"Time algorithm took to run: {(endTime - startTime) * 1000:.6f} ms")
+        graph.close()
+        return
+
+    if(goal is None):
+        startTime = time.time()
+        goal, path, cost, nodes, size = graph.nearest(start, goals)
+        endTime = time.time()
+        if(path):
+            print(f"Nearest of {len(goals)} goals: {goal}")
+            print("Route found:", " -> ".join(path))
+            print("Distance:", round(cost, 1), "miles")
+        else:
+            print("NO PATH FOUND")
+        print("Total nodes generated:", nodes)
+        print("Nodes remaining on frontier:", size)
+        print(f"Time algorithm took to run: {(endTime - startTime) * 1000:.6f} ms")
+        graph.close()
+        return
+
+    heuristic = graph.hop_heuristic(goal) if args.heuristic == "hops" else None
+    if(args.shards):
+        graph.adjacency.reset_counters()
+
+    try:
+        path, cost, nodes, size, ms, stats = graph.search(start, goal, algo, heuristic, args.memory)
+    except (ImportError, ValueError) as e:
+        print("error:", e)
+        sys.exit(1)
+    metrics.add_time("search", ms / 1000)
+    metrics.count(**stats)
+    if(args.shards):
+        metrics.count(shard_loads=graph.adjacency.loads, shard_hits=graph.adjacency.hits)
+
+    if(path):
+        print("Route found:", " -> ".join(path))
+        if(algo in ("dijkstra", "idastar", "smastar")):
+            print("Distance:", round(cost, 1), "miles")
+        else:
+            print("Edges:", cost)
     else:
-        print("Edges:", cost)
-else:
-    print("NO PATH FOUND")
+        print("NO PATH FOUND")
+
+    print("Total nodes generated:", nodes)
+    print("Nodes remaining on frontier:", size)
+    if("reexpansions" in stats):
+        print("Node expansions:", stats["expansions"])
+        print("Node re-expansions:", stats["reexpansions"])
+        print("Peak nodes in memory:", stats["peak_memory"])
+    if(args.shards):
+        print(f"Shard loads: {graph.adjacency.loads} ({graph.adjacency.hits} lookups hit a resident shard)")
+    print(f"Time algorithm took to run: {ms:.6f} ms")
+
+    if(args.multi_source):
+        sources = [token.strip() for token in args.multi_source.split(",")]
+        if(any(source not in graph for source in sources)):
+            print("error: multi source node not in given data")
+            sys.exit(1)
+        try:
+            startTime = time.time()
+            csr = graph.csr()
+            builtTime = time.time()
+            hops = csr.multi_source_hops([csr.ids[source] for source in sources])
+            endTime = time.time()
+        except ImportError as e:
+            print("error:", e)
+            sys.exit(1)
+        print(f"\nHops to {goal} from {len(sources)} sources:")
+        for source, row in zip(sources, hops):
+            toGoal = row[csr.ids[goal]]
+            print(f"{source}: {toGoal if toGoal >= 0 else 'unreachable'} ({int((row >= 0).sum())} nodes reachable)")
+        print(f"CSR build: {(builtTime - startTime) * 1000:.6f} ms, multi source bfs: {(endTime - builtTime) * 1000:.6f} ms")
+
+    if(args.k_paths):
+        print(f"\n{args.k_paths} shortest loopless routes:")
+        startTime = time.time()
+        lastTime = startTime
+        found = 0
+        for path, cost in graph.k_shortest_paths(start, goal, args.k_paths):
+            now = time.time()
+            found += 1
+            print(f"k={found} ({(now - lastTime) * 1000:.6f} ms):", " -> ".join(path), f"({round(cost, 1)} miles)")
+            lastTime = now
+        if(found < args.k_paths):
+            print(f"only {found} loopless routes exist")
+        print(f"Total time for {found} routes: {(lastTime - startTime) * 1000:.6f} ms")
+
+    if(args.updates):
+        try:
+            batches = read_updates(args.updates)
+        except ValueError as e:
+            print("error:", e)
+            sys.exit(1)
+
+        startTime = time.time()
+        tree = ShortestPathTree(graph.adjacency, start)
+        endTime = time.time()
+        print(f"Shortest path tree from {start}: {len(tree.dist)} nodes in {(endTime - startTime) * 1000:.6f} ms")
+
+        for i, batch in enumerate(batches, 1):
+            try:
+                changes = graph.apply_updates(batch)
+            except ValueError as e:
+                print("error:", e)
+                sys.exit(1)
+            startTime = time.time()
+            tree.update(changes)
+            endTime = time.time()
+            # from scratch for comparison
+            scratchStart = time.time()
+            search(graph.adjacency, start, goal, "dijkstra")
+            scratchEnd = time.time()
+
+            print(f"\nUpdate batch {i}: {len(changes)} of {len(batch)} updates changed the graph")
+            path, cost = tree.path_to(goal)
+            if(path):
+                print("Route found:", " -> ".join(path))
+                print("Distance:", round(cost, 1), "miles")
+            else:
+                print("NO PATH FOUND")
+            print("Nodes re-settled by repair:", tree.settled, "of", len(tree.dist))
+            print(f"Repair time: {(endTime - startTime) * 1000:.6f} ms "
+                  f"(search from scratch: {(scratchEnd - scratchStart) * 1000:.6f} ms)")
+
+    graph.close()
 
-print("Total nodes generated:", nodes)
-print("Nodes remaining on frontier:", size)
-print(f"Time algorithm took to run: {(endTime - startTime) * 1000:.6f} ms")
 
-datafile.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# Benjamin Zignego
+# out of core graph storage for search.py
+#
+# the graph gets cut into shards of nodes that are close together (consecutive runs of a
+# bfs order) and each shard is its own file. ShardedGraph looks like the graph dict that
+# search.py builds, but only maps a shard in when the search first touches one of its
+# nodes, and keeps the most recently used few around
+#
+# on disk (all little endian):
+#   names.txt          node name per line, line number = node id
+#   index.bin          MAGIC, node count, shard count, then (shard, slot) per node id
+#   shard_00000.bin    SHARD_MAGIC, node count, then per slot (node id, first edge,
+#                      edge count), then edges as (neighbor id, distance)
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+
+MAGIC = b"RSINDEX1"
+SHARD_MAGIC = b"RSSHARD1"
+COUNTS = struct.Struct("<II")     # nodes, shards
+COUNT = struct.Struct("<I")
+SLOT = struct.Struct("<II")       # shard, slot within shard
+NODE = struct.Struct("<III")      # node id, first edge, edge count
+EDGE = struct.Struct("<Id")       # neighbor id, distance
+LINE = struct.Struct("<IId")      # one csv line while building
+
+
+def shard_path(dirpath, shard):
+    return os.path.join(dirpath, f"shard_{shard:05d}.bin")
+
+
+# turn a csv edge list (same format search.py reads) into a shard directory without
+# ever holding the edges in memory: only per-node arrays and the name table are
+def build_shards(csvpath, dirpath, shardSize=1024):
+    os.makedirs(dirpath, exist_ok=True)
+    ids = {}
+    names = []
+    degree = array('I')
+
+    def node_id(name):
+        i = ids.get(name)
+        if(i is None):
+            i = ids[name] = len(names)
+            names.append(name)
+            degree.append(0)
+        return i
+
+    # pass 1: number the nodes, count degrees, spool edges to a temp file
+    lines = tempfile.TemporaryFile(dir=dirpath)
+    with open(csvpath) as datafile:
+        for line in datafile:
+            line = line.strip()
+            if(line and not line.startswith("#")):
+                city1, city2, dist = [token.strip() for token in line.split(",")]
+                a = node_id(city1)
+                b = node_id(city2)
+                degree[a] += 1
+                degree[b] += 1
+                lines.write(LINE.pack(a, b, float(dist)))
+
+    # pass 2: lay the edges out by source node (csr) in a second temp file
+    count = len(names)
+    offsets = array('Q', [0]) * (count + 1)
+    for i in range(count):
+        offsets[i + 1] = offsets[i] + degree[i]
+    total = offsets[count]
+    csrFile = tempfile.TemporaryFile(dir=dirpath)
+    csrFile.truncate(max(total, 1) * EDGE.size)
+    csr = mmap.mmap(csrFile.fileno(), max(total, 1) * EDGE.size)
+    cursor = array('Q', offsets)
+    lines.seek(0)
+    while True:
+        chunk = lines.read(LINE.size * 4096)
+        if(not chunk):
+            break
+        for a, b, dist in LINE.iter_unpack(chunk):
+            EDGE.pack_into(csr, cursor[a] * EDGE.size, b, dist)
+            cursor[a] += 1
+            EDGE.pack_into(csr, cursor[b] * EDGE.size, a, dist)
+            cursor[b] += 1
+    lines.close()
+
+    # bfs order so neighbors mostly land in the same shard
+    order = array('I')
+    seen = bytearray(count)
+    for root in range(count):
+        if(seen[root]):
+            continue
+        seen[root] = 1
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor, _ = EDGE.unpack_from(csr, e * EDGE.size)
+                if(not seen[neighbor]):
+                    seen[neighbor] = 1
+                    queue.append(neighbor)
+
+    shards = (count + shardSize - 1) // shardSize
+    slots = bytearray(SLOT.size * count)
+    for shard in range(shards):
+        members = order[shard * shardSize:(shard + 1) * shardSize]
+        with open(shard_path(dirpath, shard), "wb") as out:
+            out.write(SHARD_MAGIC + COUNT.pack(len(members)))
+            first = 0
+            for slot, node in enumerate(members):
+                SLOT.pack_into(slots, node * SLOT.size, shard, slot)
+                out.write(NODE.pack(node, first, degree[node]))
+                first += degree[node]
+            for node in members:
+                out.write(csr[offsets[node] * EDGE.size:offsets[node + 1] * EDGE.size])
+    csr.close()
+    csrFile.close()
+
+    with open(os.path.join(dirpath, "index.bin"), "wb") as out:
+        out.write(MAGIC + COUNTS.pack(count, shards))
+        out.write(slots)
+    with open(os.path.join(dirpath, "names.txt"), "w") as out:
+        for name in names:
+            out.write(name + "\n")
+    return count, shards
+
+
+class _Shard:
+    """One mapped shard file; adjacency dicts are decoded the first time they're asked for."""
+
+    def __init__(self, path, names):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if(self.data[:len(SHARD_MAGIC)] != SHARD_MAGIC):
+            raise ValueError(f"{path} is not a shard file")
+        self.count, = COUNT.unpack_from(self.data, len(SHARD_MAGIC))
+        self.nodesAt = len(SHARD_MAGIC) + COUNT.size
+        self.edgesAt = self.nodesAt + self.count * NODE.size
+        self.names = names
+        self.decoded = {}
+
+    def edges(self, slot):
+        adjacency = self.decoded.get(slot)
+        if(adjacency is None):
+            _, first, degree = NODE.unpack_from(self.data, self.nodesAt + slot * NODE.size)
+            start = self.edgesAt + first * EDGE.size
+            names = self.names
+            adjacency = {names[neighbor]: dist for neighbor, dist in
+                         EDGE.iter_unpack(self.data[start:start + degree * EDGE.size])}
+            self.decoded[slot] = adjacency
+        return adjacency
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+class ShardedGraph(Mapping):
+    """
+    Read-only stand-in for search.py's graph dict over a directory from build_shards().
+    graph[name] maps neighbor -> distance; the shard holding name is mapped in on first
+    use and at most `resident` shards stay open (least recently used goes first).
+    loads/hits count shard lookups since the last reset_counters(). Lookups from several
+    threads at once are fine: the shard cache is only touched under a lock.
+    """
+
+    def __init__(self, dirpath, resident=8):
+        self.dirpath = dirpath
+        self.resident = resident
+        with open(os.path.join(dirpath, "names.txt")) as namefile:
+            self.names = [line.rstrip("\n") for line in namefile]
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        with open(os.path.join(dirpath, "index.bin"), "rb") as indexfile:
+            if(indexfile.read(len(MAGIC)) != MAGIC):
+                raise ValueError(f"{dirpath} is not a shard directory")
+            count, self.shards = COUNTS.unpack(indexfile.read(COUNTS.size))
+            self.slots = indexfile.read(count * SLOT.size)
+        self.cache = OrderedDict()  # shard -> _Shard, most recently used last
+        self.lock = threading.Lock()
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.loads = 0
+        self.hits = 0
+
+    def _shard(self, shard):
+        loaded = self.cache.get(shard)
+        if(loaded is not None):
+            self.hits += 1
+            self.cache.move_to_end(shard)
+            return loaded
+        self.loads += 1
+        loaded = self.cache[shard] = _Shard(shard_path(self.dirpath, shard), self.names)
+        if(len(self.cache) > self.resident):
+            _, evicted = self.cache.popitem(last=False)
+            evicted.close()
+        return loaded
+
+    def __getitem__(self, name):
+        shard, slot = SLOT.unpack_from(self.slots, self.ids[name] * SLOT.size)
+        with self.lock:
+            return self._shard(shard).edges(slot)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def close(self):
+        with self.lock:
+            for loaded in self.cache.values():
+                loaded.close()
+            self.cache.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Route Graph Sharder",
+                                     description="Split a csv edge list into bfs-ordered shard files that search.py can page in with -d",
+                                     epilog="Benjamin Zignego")
+    parser.add_argument("-f", "--file", help="path to csv file containing nodes and distances")
+    parser.add_argument("-o", "--output", help="directory to write the shards to")
+    parser.add_argument("-n", "--shard_size", type=int, default=1024, help="nodes per shard")
+    args = parser.parse_args()
+
+    if(not args.file or not os.path.isfile(args.file)):
+        print("error: invalid filepath")
+        sys.exit(1)
+    elif(not args.output or args.shard_size < 1):
+        print("error: invalid arg or incorrect number of args")
+        sys.exit(1)
+
+    startTime = time.time()
+    count, shards = build_shards(args.file, args.output, args.shard_size)
+    endTime = time.time()
+    print(f"{count} nodes in {shards} shards written to {args.output} in {(endTime - startTime) * 1000:.3f} ms")
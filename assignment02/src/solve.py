@@ -1,10 +1,17 @@
 # Benjamin Zignego
 # 11/19/2025
 import argparse
+import random
 import time
 import sys
 import pathlib
-from collections import defaultdict, namedtuple
+from array import array
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# the shared --profile/--metrics layer lives at the repo root
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+import instrument
 
 # python data stucture wowee
 Variable = namedtuple("Variable", ["name", "cells", "length", "number", "direction"])
@@ -17,6 +24,12 @@ def build_csp(variables, dictionary):
     for var in variables:
         domains[var.name] = sorted([word for word in dictionary if len(word) == var.length])
 
+    neighbors, intersections = build_crossings(variables)
+
+    return domains, neighbors, intersections
+
+# just the crossings, no word lists (cell by cell filling walks the dawg instead)
+def build_crossings(variables):
     neighbors = defaultdict(set)
     intersections = dict()  
     cells = defaultdict(list)
@@ -38,7 +51,7 @@ def build_csp(variables, dictionary):
 
     constraintEdges = len({frozenset([a,b]) for (a,b) in intersections.keys()}) // 1
 
-    return domains, neighbors, intersections
+    return neighbors, intersections
 
 # to help with finding blanks and such
 def extract_variables(rows, cols, grid, numbers):
@@ -216,6 +229,8 @@ def backtracking_search(variables, domains, neighbors, intersections, variableSe
     variablesOrder = [v.name for v in variables]
     assignment = {}
     nodes = 0
+    checks = 0  # is_consistent calls
+    prunes = 0  # values it turned down
     startTime = time.perf_counter()
     constraint_set = set()
 
@@ -226,7 +241,7 @@ def backtracking_search(variables, domains, neighbors, intersections, variableSe
 
     def backtrack(depth=0):
         # evil python recursion
-        nonlocal nodes
+        nonlocal nodes, checks, prunes
         nodes += 1
         if len(assignment) == len(variablesOrder):
             return assignment.copy()
@@ -246,12 +261,14 @@ def backtracking_search(variables, domains, neighbors, intersections, variableSe
 
         for val in vals:
             flag = is_consistent(var, val, assignment, domains, neighbors, intersections, lfc)
+            checks += 1
 
             if verbosity >= 2:
                 indent = "  " * depth
                 print(f"{indent}Try {var}={val} -> {'consistent' if ok else 'inconsistent'}")
 
             if not flag:
+                prunes += 1
                 continue
 
             assignment[var] = val
@@ -267,11 +284,602 @@ def backtracking_search(variables, domains, neighbors, intersections, variableSe
     solution = backtrack(0)
     endTime = time.perf_counter()
     elapsed = endTime - startTime
+    instrument.metrics.count(backtrack_calls=nodes, consistency_checks=checks, prunes=prunes)
 
     return solution, elapsed, nodes, len(variablesOrder), numConstraints
 
+# Decomposition shenanigans
+# slots only interact through crossings, so each connected piece of the neighbors graph
+# is its own puzzle, and a slot whose removal cuts a piece in two (an articulation slot)
+# lets us fix that one word and then solve the halves separately: a sum, not a product
+def constraint_components(names, neighbors):
+    inSet = set(names)
+    seen = set()
+    components = []
+    for name in names:
+        if name in seen:
+            continue
+        seen.add(name)
+        comp = []
+        stack = [name]
+        while stack:
+            var = stack.pop()
+            comp.append(var)
+            for n in neighbors[var]:
+                if n in inSet and n not in seen:
+                    seen.add(n)
+                    stack.append(n)
+        # keep the caller's ordering (static variable selection depends on it)
+        order = set(comp)
+        components.append([v for v in names if v in order])
+    return components
+
+# Tarjan's articulation points, iterative so big grids don't hit the recursion limit
+def articulation_slots(names, neighbors):
+    inSet = set(names)
+    index = {}
+    low = {}
+    result = set()
+    counter = 0
+    for root in names:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        rootChildren = 0
+        stack = [(root, None, iter(neighbors[root]))]
+        while stack:
+            var, parent, it = stack[-1]
+            descended = False
+            for n in it:
+                if n not in inSet:
+                    continue
+                if n not in index:
+                    index[n] = low[n] = counter
+                    counter += 1
+                    stack.append((n, var, iter(neighbors[n])))
+                    descended = True
+                    break
+                elif n != parent:
+                    low[var] = min(low[var], index[n])
+            if descended:
+                continue
+            stack.pop()
+            if parent is not None:
+                low[parent] = min(low[parent], low[var])
+                if parent == root:
+                    rootChildren += 1
+                elif low[var] >= index[parent]:
+                    result.add(parent)
+        if rootChildren > 1:
+            result.add(root)
+    return result
+
+# the articulation slot leaving the smallest biggest piece (fewest words to try on ties)
+def best_cut(names, domains, neighbors):
+    best = None
+    bestKey = None
+    for cut in articulation_slots(names, neighbors):
+        rest = [v for v in names if v != cut]
+        key = (max(len(c) for c in constraint_components(rest, neighbors)), len(domains[cut]), cut)
+        if bestKey is None or key < bestKey:
+            best = cut
+            bestKey = key
+    return best
+
+# backtracking on each independent piece, recursing through articulation slots.
+# returns (solution or None, backtracking calls, pieces solved)
+def solve_decomposed(variables, domains, neighbors, intersections, variableSelection, valueOrder, lfc, verbosity):
+    names = [v.name for v in variables]
+    byName = {v.name: v for v in variables}
+    components = constraint_components(names, neighbors)
+    if len(components) > 1:
+        solution = {}
+        calls = 0
+        pieces = 0
+        for comp in components:
+            part, c, p = solve_decomposed([byName[v] for v in comp], domains, neighbors, intersections, variableSelection, valueOrder, lfc, verbosity)
+            calls += c
+            pieces += p
+            if part is None:
+                return None, calls, pieces
+            solution.update(part)
+        return solution, calls, pieces
+
+    cut = best_cut(names, domains, neighbors) if len(names) >= 3 else None
+    if cut is None:
+        part, _, calls, _, _ = backtracking_search(variables, domains, neighbors, intersections, variableSelection, valueOrder, lfc, verbosity)
+        return part, calls, 1
+
+    # neighbors without the cut slot: its word gets baked into the crossing domains instead
+    restNames = [v for v in names if v != cut]
+    cutNeighbors = {v: neighbors[v] - {cut} for v in restNames}
+    pieces = constraint_components(restNames, cutNeighbors)
+    if verbosity >= 1:
+        print(f"Splitting on {cut}: pieces of {', '.join(str(len(p)) for p in pieces)} slots")
+
+    calls = 0
+    solved = 0
+    cache = {}  # (piece, letters the cut word puts on its crossings) -> solution or None
+    for val in domains[cut]:
+        calls += 1
+        solution = {cut: val}
+        for k, piece in enumerate(pieces):
+            crossing = [n for n in neighbors[cut] if n in cutNeighbors and n in piece]
+            key = (k, tuple(val[intersections[(cut, n)][0]] for n in crossing))
+            if key not in cache:
+                subDomains = {v: domains[v] for v in piece}
+                for n in crossing:
+                    i, j = intersections[(cut, n)]
+                    subDomains[n] = [w for w in domains[n] if w[j] == val[i]]
+                part, c, p = solve_decomposed([byName[v] for v in piece], subDomains, cutNeighbors, intersections, variableSelection, valueOrder, lfc, verbosity)
+                calls += c
+                solved += p
+                cache[key] = part
+            if cache[key] is None:
+                solution = None
+                break
+            solution.update(cache[key])
+        if solution is not None:
+            return solution, calls, solved
+    return None, calls, solved
+
+# also hands back what the piece added to the counters, which a pool worker would lose
+def _solve_piece(job):
+    before = Counter(instrument.metrics.counters)
+    return solve_decomposed(*job), instrument.metrics.counters - before
+
+# independent components handed out to a process pool, results merged
+def solve_components_parallel(variables, domains, neighbors, intersections, variableSelection, valueOrder, lfc, verbosity, jobs):
+    startTime = time.perf_counter()
+    names = [v.name for v in variables]
+    byName = {v.name: v for v in variables}
+    components = constraint_components(names, neighbors)
+    numConstraints = len({tuple(sorted(pair)) for pair in intersections.keys()})
+    work = []
+    for comp in components:
+        inComp = set(comp)
+        work.append(([byName[v] for v in comp], {v: domains[v] for v in comp},
+                     {v: neighbors[v] & inComp for v in comp},
+                     {pair: ij for pair, ij in intersections.items() if pair[0] in inComp},
+                     variableSelection, valueOrder, lfc, verbosity))
+
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+            results = []
+            for result, counted in pool.map(_solve_piece, work):
+                instrument.metrics.count(**counted)
+                results.append(result)
+    else:
+        results = []
+        for job in work:
+            results.append(_solve_piece(job)[0])
+            if results[-1][0] is None:
+                break
+
+    solution = {}
+    calls = 0
+    pieces = 0
+    for part, c, p in results:
+        calls += c
+        pieces += p
+        if part is None:
+            solution = None
+        elif solution is not None:
+            solution.update(part)
+    elapsed = time.perf_counter() - startTime
+    stats = {"components": len(components), "articulation": len(articulation_slots(names, neighbors)), "pieces": pieces}
+    return solution, elapsed, calls, len(names), numConstraints, stats
+
+# Dictionary shenanigans
+class WordDAWG:
+    """
+    Minimal acyclic word graph of the dictionary: words share prefixes like a trie and
+    also share suffixes, so the large dictionary is a few flat arrays instead of a list of
+    strings. Node n's edges are labels/targets[first[n]:first[n+1]], final[n] says a word
+    ends at n, and bit k of lengths[n] says some word goes on exactly k more letters from n.
+    Iterating gives the words in sorted order, so it stands in for the word list.
+    """
+
+    def __init__(self, words):
+        words = sorted(set(words))
+        if words and max(len(w) for w in words) > 63:
+            raise ValueError("dawg length masks only go up to 63 letter words")
+        # Daciuk et al. incremental construction: words come in sorted, and once the next
+        # word leaves a branch that branch can never change again, so it gets merged with an
+        # identical node already registered (same finality, same edges) or registered itself
+        children = [{}]
+        final = [False]
+        register = {}
+        unchecked = []  # (parent, letter, child) down the previous word, not merged yet
+
+        def minimize(downTo):
+            while len(unchecked) > downTo:
+                parent, letter, child = unchecked.pop()
+                key = (final[child], tuple(sorted(children[child].items())))
+                same = register.get(key)
+                if same is None:
+                    register[key] = child
+                    children[child] = key[1]  # frozen now, share the key's edges instead of a dict
+                else:
+                    children[parent][letter] = same
+                    children[child] = None  # merged away, nothing points at it any more
+
+        previous = ""
+        for word in words:
+            common = 0
+            while common < min(len(word), len(previous)) and word[common] == previous[common]:
+                common += 1
+            minimize(common)
+            node = unchecked[-1][2] if unchecked else 0
+            for letter in word[common:]:
+                children.append({})
+                final.append(False)
+                children[node][letter] = len(children) - 1
+                unchecked.append((node, letter, len(children) - 1))
+                node = len(children) - 1
+            final[node] = True
+            previous = word
+        minimize(0)
+        children[0] = tuple(sorted(children[0].items()))
+        del register
+
+        # freeze the reachable nodes into arrays, root is 0
+        ids = {0: 0}
+        order = [0]
+        for node in order:
+            for letter, kid in children[node]:
+                if kid not in ids:
+                    ids[kid] = len(order)
+                    order.append(kid)
+        self.first = array('I', [0])
+        self.targets = array('I')
+        labels = []
+        self.final = bytearray()
+        for node in order:
+            for letter, kid in children[node]:
+                labels.append(letter)
+                self.targets.append(ids[kid])
+            self.first.append(len(self.targets))
+            self.final.append(final[node])
+        self.labels = ''.join(labels)
+
+        # suffix lengths reachable from each node; children come after parents in bfs
+        # order only in a tree, so just go deepest-first by memoizing
+        self.lengths = array('I' if not words or max(len(w) for w in words) < 32 else 'Q', [0]) * len(order)
+        done = bytearray(len(order))
+        for start in range(len(order) - 1, -1, -1):
+            stack = [start]
+            while stack:
+                node = stack[-1]
+                if done[node]:
+                    stack.pop()
+                    continue
+                pending = [kid for kid in self.targets[self.first[node]:self.first[node + 1]] if not done[kid]]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                mask = 1 if self.final[node] else 0
+                for kid in self.targets[self.first[node]:self.first[node + 1]]:
+                    mask |= self.lengths[kid] << 1
+                self.lengths[node] = mask
+                done[node] = 1
+                stack.pop()
+        self.count = len(words)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        stack = [(0, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if self.final[node]:
+                yield prefix
+            # pushed backwards so they pop in alphabetical order
+            for e in range(self.first[node + 1] - 1, self.first[node] - 1, -1):
+                stack.append((self.targets[e], prefix + self.labels[e]))
+
+    def __contains__(self, word):
+        node = 0
+        for letter in word:
+            node = self.child(node, letter)
+            if node < 0:
+                return False
+        return bool(self.final[node])
+
+    def letters(self, node):
+        return self.labels[self.first[node]:self.first[node + 1]]
+
+    def child(self, node, letter):
+        e = self.labels.find(letter, self.first[node], self.first[node + 1])
+        return self.targets[e] if e >= 0 else -1
+
+    # can a word run exactly `remaining` more letters from node
+    def can_finish(self, node, remaining):
+        return (self.lengths[node] >> remaining) & 1
+
+    def num_nodes(self):
+        return len(self.final)
+
+# Cell by cell shenanigans
+# instead of whole words, fill one cell at a time in row-major order. That way every slot
+# gets its letters front to back, so each slot just remembers the dawg node its prefix got
+# to, and a letter only goes in a cell if every slot through that cell can keep going with
+# it and still reach a word of exactly the right length. Dead crossings show up after one
+# letter instead of after a whole word
+def cell_fill_search(variables, dawg, intersections, verbosity):
+    startTime = time.perf_counter()
+    numConstraints = len({tuple(sorted(pair)) for pair in intersections.keys()})
+    slotsAt = defaultdict(list)  # cell -> [(slot index, position in slot)]
+    for k, var in enumerate(variables):
+        for i, cell in enumerate(var.cells):
+            slotsAt[cell].append((k, var.length - i - 1))
+    cells = sorted(slotsAt)
+    state = [0] * len(variables)  # dawg node each slot's prefix has reached
+    letters = {}
+    calls = 0
+    # one frame per cell, big grids go deeper than python's default limit
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), len(cells) + 100))
+
+    def fill(depth):
+        nonlocal calls
+        calls += 1
+        if depth == len(cells):
+            return True
+        cell = cells[depth]
+        owners = slotsAt[cell]
+
+        candidates = dawg.letters(state[owners[0][0]])
+        for k, _ in owners[1:]:
+            allowed = dawg.letters(state[k])
+            candidates = [ch for ch in candidates if ch in allowed]
+
+        if verbosity >= 2:
+            print(f"{'  ' * depth}Cell {cell}: trying {''.join(candidates)}")
+
+        saved = [state[k] for k, _ in owners]
+        for ch in candidates:
+            ok = True
+            for k, remaining in owners:
+                node = dawg.child(state[k], ch)
+                if not dawg.can_finish(node, remaining):
+                    ok = False
+                    break
+                state[k] = node
+            if ok:
+                letters[cell] = ch
+                if fill(depth + 1):
+                    return True
+            for (k, _), node in zip(owners, saved):
+                state[k] = node
+        return False
+
+    solution = None
+    if fill(0):
+        solution = {var.name: ''.join(letters[cell] for cell in var.cells) for var in variables}
+    elapsed = time.perf_counter() - startTime
+    instrument.metrics.count(cell_fill_calls=calls)
+    return solution, elapsed, calls, len(variables), numConstraints
+
+# Counting shenanigans
+class SolutionCounter:
+    """
+    Counts or lists every fill instead of stopping at the first. Once some slots are
+    filled, what's left only depends on which slots are still empty and the letters the
+    filled ones put on their crossings, so each connected piece of the empty slots is
+    memoized on (piece, boundary letters) -> number of fills. Pieces multiply, branches add.
+    solutions() walks the same tree but only steps into branches whose count isn't zero,
+    yielding each fill as it's found rather than keeping them around.
+    """
+
+    def __init__(self, variables, domains, neighbors, intersections):
+        self.order = [v.name for v in variables]
+        # a word listed twice in the dictionary is still one fill
+        self.domains = {name: list(dict.fromkeys(domains[name])) for name in self.order}
+        # (slot, position, letter) -> words with that letter there
+        self.byLetter = defaultdict(list)
+        for name in self.order:
+            for w in self.domains[name]:
+                for i, ch in enumerate(w):
+                    self.byLetter[(name, i, ch)].append(w)
+        self.neighbors = neighbors
+        self.intersections = intersections
+        self.assignment = {}
+        self.memo = {}
+        self.calls = 0
+
+    def _candidates(self, var):
+        checks = []
+        for n in self.neighbors[var]:
+            if n in self.assignment:
+                i, j = self.intersections[(var, n)]
+                checks.append((i, self.assignment[n][j]))
+        if not checks:
+            return self.domains[var]
+        # start from the shortest word list any one crossing allows
+        i, ch = min(checks, key=lambda c: len(self.byLetter.get((var, c[0], c[1]), ())))
+        return [w for w in self.byLetter.get((var, i, ch), ()) if all(w[k] == c for k, c in checks)]
+
+    def _pick(self, names):
+        # most crossings already filled, then smallest domain
+        return max(names, key=lambda v: (sum(1 for n in self.neighbors[v] if n in self.assignment), -len(self.domains[v])))
+
+    def _key(self, names):
+        boundary = []
+        for v in names:
+            for n in self.neighbors[v]:
+                if n in self.assignment:
+                    i, j = self.intersections[(v, n)]
+                    boundary.append((v, i, self.assignment[n][j]))
+        return names, tuple(sorted(boundary))
+
+    def _count(self, names):
+        key = self._key(names)
+        known = self.memo.get(key)
+        if known is not None:
+            return known
+        self.calls += 1
+        var = self._pick(names)
+        rest = [v for v in names if v != var]
+        total = 0
+        for val in self._candidates(var):
+            self.assignment[var] = val
+            ways = 1
+            for piece in constraint_components(rest, self.neighbors):
+                ways *= self._count(tuple(piece))
+                if not ways:
+                    break
+            total += ways
+            del self.assignment[var]
+        self.memo[key] = total
+        return total
+
+    def count(self):
+        total = 1
+        for piece in constraint_components(self.order, self.neighbors):
+            total *= self._count(tuple(piece))
+        return total
+
+    def solutions(self):
+        if self.count():
+            yield from self._walk(self.order)
+
+    def _walk(self, names):
+        if not names:
+            yield dict(self.assignment)
+            return
+        var = self._pick(names)
+        rest = [v for v in names if v != var]
+        for val in self._candidates(var):
+            self.assignment[var] = val
+            if all(self._count(tuple(piece)) for piece in constraint_components(rest, self.neighbors)):
+                yield from self._walk(rest)
+            del self.assignment[var]
+
+# Local search shenanigans
+# min-conflicts with a tabu list: start from a random full fill and keep rewriting one
+# conflicted slot to the word that breaks the fewest crossings. Recently replaced words
+# are off limits for tabuTenure steps (unless taking one would beat the best fill so far)
+# so it can't just flip back and forth, and with probability noise it takes a random word
+# that agrees with at least one crossing instead (a random walk step, WalkSAT style).
+# Stops at zero conflicts or after timeLimit seconds
+def min_conflicts_search(variables, domains, neighbors, intersections, timeLimit, tabuTenure, noise, seed, verbosity):
+    rng = random.Random(seed)
+    variablesOrder = [v.name for v in variables]
+    startTime = time.perf_counter()
+    constraint_set = {tuple(sorted(pair)) for pair in intersections.keys()}
+    numConstraints = len(constraint_set)
+
+    if any(not domains[var] for var in variablesOrder):
+        return None, 0, time.perf_counter() - startTime, 0, [], len(variablesOrder), numConstraints
+
+    # byLetter[var][i][ch]: indices into domains[var] of words with ch at position i
+    byLetter = {}
+    for var in variablesOrder:
+        table = defaultdict(lambda: defaultdict(list))
+        for k, word in enumerate(domains[var]):
+            for n in neighbors[var]:
+                i, _ = intersections[(var, n)]
+                table[i][word[i]].append(k)
+        byLetter[var] = table
+
+    assignment = {var: rng.choice(domains[var]) for var in variablesOrder}
+
+    def clashes(var, val):
+        count = 0
+        for n in neighbors[var]:
+            i, j = intersections[(var, n)]
+            if val[i] != assignment[n][j]:
+                count += 1
+        return count
+
+    conflictsOf = {var: clashes(var, assignment[var]) for var in variablesOrder}
+    conflicted = {var for var in variablesOrder if conflictsOf[var]}
+    total = sum(conflictsOf.values()) // 2
+    best = total
+    bestAssignment = dict(assignment)
+    tabu = {}  # (var, word) -> step it's allowed again
+    history = [(0.0, total)]
+    steps = 0
+
+    while conflicted:
+        elapsed = time.perf_counter() - startTime
+        if elapsed >= timeLimit:
+            break
+        steps += 1
+
+        var = rng.choice(tuple(conflicted))
+        words = domains[var]
+        # matches[k]: crossings word k would agree with
+        matches = Counter()
+        for n in neighbors[var]:
+            i, j = intersections[(var, n)]
+            matches.update(byLetter[var][i].get(assignment[n][j], ()))
+        degree = len(neighbors[var])
+        current = conflictsOf[var]
+        old = assignment[var]
+
+        bestCost = None
+        choices = []
+        for k, agree in matches.items():
+            cost = degree - agree
+            if tabu.get((var, words[k]), 0) > steps and total - current + cost >= best:
+                continue
+            if bestCost is None or cost < bestCost:
+                bestCost = cost
+                choices = [k]
+            elif cost == bestCost:
+                choices.append(k)
+        if not choices:
+            # nothing allowed agrees with any crossing, so every word is as bad: pick one
+            k = rng.randrange(len(words))
+            if tabu.get((var, words[k]), 0) > steps:
+                continue
+            choices = [k]
+        elif rng.random() < noise:
+            # random walk step: any word that agrees with at least one crossing
+            choices = list(matches.keys())
+
+        new = words[rng.choice(choices)]
+        if new == old:
+            continue
+        tabu[(var, old)] = steps + tabuTenure
+        assignment[var] = new
+
+        # fix up the crossing counts around var
+        for n in neighbors[var]:
+            i, j = intersections[(var, n)]
+            before = old[i] != assignment[n][j]
+            after = new[i] != assignment[n][j]
+            if before != after:
+                delta = 1 if after else -1
+                conflictsOf[n] += delta
+                conflictsOf[var] += delta
+                total += delta
+                if conflictsOf[n]:
+                    conflicted.add(n)
+                else:
+                    conflicted.discard(n)
+        if conflictsOf[var]:
+            conflicted.add(var)
+        else:
+            conflicted.discard(var)
+
+        if total < best:
+            best = total
+            bestAssignment = dict(assignment)
+            history.append((time.perf_counter() - startTime, total))
+            if verbosity >= 1:
+                print(f"  {history[-1][0]:.3f}s step {steps}: {total} conflicts")
+
+    elapsed = time.perf_counter() - startTime
+    history.append((elapsed, best))
+    return bestAssignment, best, elapsed, steps, history, len(variablesOrder), numConstraints
+
 # Begin file parsing helpers #
-def load_dictionary(filename):
+# dawg=True gives a WordDAWG instead of a plain list (what cell by cell filling needs)
+def load_dictionary(filename, dawg=False):
     words = []
 
     with open(filename, 'r') as f:
@@ -280,6 +888,8 @@ def load_dictionary(filename):
             if w:
                 words.append(w.upper())
 
+    if dawg:
+        return WordDAWG(words)
     return words
 
 def load_puzzle(filename):
@@ -351,26 +961,108 @@ def main():
     parser.add_argument("-vs", "--variable-selection", default="static", help="how variables should be ordered in backtracking (default=static)", choices=["static", "mrv", "deg", "mrv+deg"])
     parser.add_argument("-vo", "--value-order", default="static", help="order in which a variable's values will be iterated (default=static)", choices=["static", "lcv"])
     parser.add_argument("-lfc", "--limited-forward-check", help="if limited forward checking should be used for consistency", action='store_true')
+    parser.add_argument("-fm", "--fill-mode", default="slot", help="backtrack over whole words per slot, or letters per cell pruned by a dawg of the dictionary (default=slot)", choices=["slot", "cell"])
+    parser.add_argument("-dc", "--decompose", help="solve each independent piece of the puzzle on its own, splitting at articulation slots", action='store_true')
+    parser.add_argument("-j", "--jobs", default=1, help="processes for solving independent pieces with -dc in parallel (default=1)", type=int)
+    parser.add_argument("--count", help="count every fill of the puzzle instead of stopping at the first", action='store_true')
+    parser.add_argument("--all", help="print every fill of the puzzle as it's found, then the count", action='store_true')
+    parser.add_argument("-s", "--solver", default="backtrack", help="complete backtracking search, or min-conflicts local search for big grids (default=backtrack)", choices=["backtrack", "minconflicts"])
+    parser.add_argument("-t", "--time-limit", default=10.0, help="seconds min-conflicts may run before giving up (default=10)", type=float)
+    parser.add_argument("--tabu", default=10, help="steps a replaced word stays off limits in min-conflicts (default=10)", type=int)
+    parser.add_argument("--noise", default=0.05, help="chance min-conflicts takes a random step instead of the best one (default=0.05)", type=float)
+    parser.add_argument("--seed", default=None, help="random seed for min-conflicts", type=int)
+    instrument.add_arguments(parser)
 
     args = parser.parse_args()
+    if args.fill_mode == "cell":
+        # cell by cell has its own fixed order and no word lists to order, check or split
+        ignored = [flag for flag, used in (("-dc", args.decompose), ("-vs", args.variable_selection != "static"),
+                                           ("-vo", args.value_order != "static"), ("-lfc", args.limited_forward_check),
+                                           ("--count", args.count), ("--all", args.all),
+                                           ("-s minconflicts", args.solver != "backtrack")) if used]
+        if ignored:
+            parser.error(f"-fm cell can't be combined with {', '.join(ignored)}")
     # End arg parsing #
 
-    dictionary = load_dictionary(args.dictionary)
-    rows, cols, grid, numbers = load_puzzle(args.puzzle)
+    with instrument.session(args, "solve"):
+        run(args)
+
+def run(args):
+    metrics = instrument.metrics
 
-    variables = extract_variables(rows, cols, grid, numbers)
-    domains, neighbors, intersections = build_csp(variables, dictionary)
+    with metrics.timer("load"):
+        dictionary = load_dictionary(args.dictionary, dawg=args.fill_mode == "cell")
+        rows, cols, grid, numbers = load_puzzle(args.puzzle)
+
+        variables = extract_variables(rows, cols, grid, numbers)
+        if args.fill_mode == "cell":
+            # turning the dawg back into a word list per slot would undo the point of it
+            domains = None
+            neighbors, intersections = build_crossings(variables)
+        else:
+            domains, neighbors, intersections = build_csp(variables, dictionary)
 
     if args.verbosity > 0:
         print(f"Variables: {len(variables)}, Constraints (pairs): {len({tuple(sorted((x,y))) for (x,y) in intersections.keys()})}")
+        if isinstance(dictionary, WordDAWG):
+            print(f"Dictionary dawg: {len(dictionary)} words in {dictionary.num_nodes()} nodes, {len(dictionary.targets)} edges")
     if args.verbosity > 1:
         print(f"Dictionary words: {len(dictionary)}")
         print(f"Puzzle size: {rows}x{cols}, variables: {len(variables)}")
         for var in variables:
-            print(f"Variable {var.name} ({var.direction}, len={var.length}): domain size {len(domains[var.name])}")
+            if domains is None:
+                print(f"Variable {var.name} ({var.direction}, len={var.length})")
+            else:
+                print(f"Variable {var.name} ({var.direction}, len={var.length}): domain size {len(domains[var.name])}")
+
+    if args.count or args.all:
+        counter = SolutionCounter(variables, domains, neighbors, intersections)
+        startTime = time.perf_counter()
+        if args.all:
+            total = 0
+            for solution in counter.solutions():
+                total += 1
+                print(f"Solution {total}:")
+                print_solution_grid(rows, cols, grid, numbers, variables, solution)
+                print(flush=True)
+        else:
+            total = counter.count()
+        elapsed = time.perf_counter() - startTime
+        metrics.add_time("solve", elapsed)
+        metrics.count(solutions=total, subproblems=counter.calls)
+        print(f"Solutions: {total}")
+        print(f"Time: {elapsed:.6f} seconds")
+        print(f"Subproblems searched: {counter.calls} ({len(counter.memo)} memoized)")
+        return
+
+    if args.solver == "minconflicts":
+        best, conflicts, elapsed, steps, history, numVars, numConstraints = min_conflicts_search(variables, domains, neighbors, intersections, args.time_limit, args.tabu, args.noise, args.seed, args.verbosity)
+        metrics.add_time("solve", elapsed)
+        metrics.count(local_search_steps=steps, conflicts_left=conflicts)
+
+        if best is not None and conflicts == 0:
+            print("SUCCESS!")
+        else:
+            print("FAILED" if best is None else f"FAILED ({conflicts} of {numConstraints} crossings still conflict)")
+        print(f"Time: {elapsed:.6f} seconds")
+        print(f"Local search steps: {steps}")
+        print("Conflicts over time:")
+        for when, remaining in history:
+            print(f"  {when:10.3f}s  {remaining}")
+        if best is not None:
+            print()
+            print_solution_grid(rows, cols, grid, numbers, variables, best)
+        return
 
     # Search
-    solution, elapsed, calls, numVars, numConstraints = backtracking_search(variables, domains, neighbors, intersections, args.variable_selection, args.value_order, args.limited_forward_check, args.verbosity)
+    if args.fill_mode == "cell":
+        solution, elapsed, calls, numVars, numConstraints = cell_fill_search(variables, dictionary, intersections, args.verbosity)
+    elif args.decompose:
+        solution, elapsed, calls, numVars, numConstraints, stats = solve_components_parallel(variables, domains, neighbors, intersections, args.variable_selection, args.value_order, args.limited_forward_check, args.verbosity, args.jobs)
+        print(f"Components: {stats['components']}, articulation slots: {stats['articulation']}, pieces solved: {stats['pieces']}")
+    else:
+        solution, elapsed, calls, numVars, numConstraints = backtracking_search(variables, domains, neighbors, intersections, args.variable_selection, args.value_order, args.limited_forward_check, args.verbosity)
+    metrics.add_time("solve", elapsed)
 
     if solution is not None:
         print("SUCCESS!")
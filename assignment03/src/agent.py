@@ -30,6 +30,17 @@ class Agent(ABC):
         """
         pass
 
+    def action_overridden(self, action):
+        """
+        Called when the driver applied a different action than the one next_action
+        returned (NO_OP after a time limit overrun), before the next call to next_action.
+        Agents that track their own position should undo what they assumed the
+        returned action did. Default: do nothing.
+
+        :param action: the Action that was actually applied
+        """
+        pass
+
     def game_over(self, score):
         """
         Called once at the end of the trial with the final score.
@@ -0,0 +1,65 @@
+# CS 452/552 - Assignment 3
+# Name: Benjamin Zignego
+
+import argparse
+import copy
+import random
+import time
+
+from action import Action
+from environment import Environment
+
+
+def rollouts_deepcopy(env, plans):
+    for plan in plans:
+        sim = copy.deepcopy(env)
+        for action in plan:
+            _, done = sim.step(action)
+            if done:
+                break
+
+
+def rollouts_snapshot(env, plans):
+    start = env.snapshot()
+    for plan in plans:
+        env.restore(start)
+        for code in plan:
+            _, done = env.step_code(code)
+            if done:
+                break
+    env.restore(start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rollouts/sec: copy.deepcopy vs snapshot/restore")
+    parser.add_argument("-g", "--grid_size", type=int, default=8,
+                        help="Grid size N (N x N world)")
+    parser.add_argument("-n", "--num_rollouts", type=int, default=5000,
+                        help="Number of rollouts per method")
+    parser.add_argument("-d", "--depth", type=int, default=30,
+                        help="Maximum actions per rollout")
+    parser.add_argument("-s", "--seed", type=int, default=12345,
+                        help="Random seed")
+    args = parser.parse_args()
+
+    env = Environment(grid_size=args.grid_size, max_actions=10 ** 9, seed=args.seed)
+    rng = random.Random(args.seed)
+    choices = [a for a in Action if a != Action.CLIMB]
+    plans = [[rng.choice(choices) for _ in range(args.depth)] for _ in range(args.num_rollouts)]
+    code_plans = [[a.value for a in plan] for plan in plans]
+
+    t0 = time.perf_counter()
+    rollouts_deepcopy(env, plans)
+    t_copy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    rollouts_snapshot(env, code_plans)
+    t_snap = time.perf_counter() - t0
+
+    print(f"deepcopy + step:        {args.num_rollouts / t_copy:12,.0f} rollouts/s")
+    print(f"snapshot + step_code:   {args.num_rollouts / t_snap:12,.0f} rollouts/s")
+    print(f"speedup: {t_copy / t_snap:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# CS 452/552 - Assignment 3
+# Name: Benjamin Zignego
+
+
+from array import array
+
+
+def iter_bits(board):
+    """Indices of the set bits of an int bitboard, lowest first."""
+    while board:
+        low = board & -board
+        yield low.bit_length() - 1
+        board ^= low
+
+
+class Grid:
+    """
+    Cell indexing and precomputed neighbor tables for an N x N board.
+
+    Cell (x, y) is bit x * N + y of a bitboard (same order as the Environment's tables),
+    so a set of cells is just a Python int and set algebra is a few bitwise operations.
+    """
+
+    def __init__(self, N):
+        self.N = N
+        self.size = N * N
+        self.full = (1 << self.size) - 1
+
+        # nbrs[i]: indices next to i; nbr_mask[i]: the same cells as a bitboard
+        self.nbrs = []
+        self.nbr_mask = []
+        # forward[i * 4 + d]: cell ahead of i when facing d (0 = EAST ... 3 = SOUTH), -1 at a wall
+        self.forward = []
+        for x in range(N):
+            for y in range(N):
+                nbs = []
+                for dx, dy in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < N and 0 <= ny < N:
+                        nbs.append(nx * N + ny)
+                        self.forward.append(nx * N + ny)
+                    else:
+                        self.forward.append(-1)
+                self.nbrs.append(tuple(nbs))
+                mask = 0
+                for j in nbs:
+                    mask |= 1 << j
+                self.nbr_mask.append(mask)
+
+        # Shifting by one moves along y; these stop bits wrapping into the next column
+        first_y = 0
+        for x in range(N):
+            first_y |= 1 << (x * N)
+        self._not_first_y = self.full & ~first_y
+        self._not_last_y = self.full & ~(first_y << (N - 1))
+
+    def table(self, fill):
+        """A per-cell int table (array) with every entry set to fill."""
+        return array('i', [fill]) * self.size
+
+    def index(self, cell):
+        x, y = cell
+        return x * self.N + y
+
+    def cell(self, i):
+        return divmod(i, self.N)
+
+    def expand(self, board):
+        """Every cell adjacent to some cell of board."""
+        N = self.N
+        return ((((board << N) | (board >> N)) & self.full)
+                | ((board << 1) & self._not_first_y)
+                | ((board >> 1) & self._not_last_y))
+
+
+class _LazyTable(dict):
+    """dict that fills in a missing key with make(key) the first time it is looked up."""
+
+    __slots__ = ("make",)
+
+    def __init__(self, make):
+        super().__init__()
+        self.make = make
+
+    def __missing__(self, key):
+        value = self[key] = self.make(key)
+        return value
+
+
+class _DefaultTable(dict):
+    """dict that reads fill for any key never assigned, without storing it."""
+
+    __slots__ = ("fill",)
+
+    def __init__(self, fill):
+        super().__init__()
+        self.fill = fill
+
+    def __missing__(self, key):
+        return self.fill
+
+
+# _SPREAD[b]: the bits of byte b moved to the even bit positions
+_SPREAD = [sum(((b >> k) & 1) << (2 * k) for k in range(8)) for b in range(256)]
+
+
+def morton_index(x, y):
+    """Z-order index of (x, y): the bits of x and y interleaved, x in the odd positions."""
+    i = 0
+    shift = 0
+    while x or y:
+        i |= ((_SPREAD[x & 255] << 1) | _SPREAD[y & 255]) << shift
+        x >>= 8
+        y >>= 8
+        shift += 16
+    return i
+
+
+def morton_cell(i):
+    """Inverse of morton_index."""
+    x = y = 0
+    k = 0
+    while i:
+        y |= (i & 1) << k
+        x |= ((i >> 1) & 1) << k
+        i >>= 2
+        k += 1
+    return x, y
+
+
+class SparseGrid:
+    """
+    Same interface as Grid for boards too big to tabulate up front.
+
+    Cells are numbered along a Z-order (Morton) curve instead of x * N + y, so a region
+    around (0, 0) only needs as many bits as its bounding square, however big N is.
+    The neighbor tables are dicts filled in the first time a cell is looked up, which
+    keeps memory proportional to the cells the agent actually reaches.
+    """
+
+    def __init__(self, N):
+        self.N = N
+        self.size = N * N
+        self.nbrs = _LazyTable(self._make_nbrs)
+        self.nbr_mask = _LazyTable(self._make_nbr_mask)
+        self.forward = _LazyTable(self._make_forward)
+        self._cells = _LazyTable(morton_cell)
+
+    def _make_nbrs(self, i):
+        return tuple(j for j in (self.forward[i * 4 + d] for d in range(4)) if j >= 0)
+
+    def _make_nbr_mask(self, i):
+        mask = 0
+        for j in self.nbrs[i]:
+            mask |= 1 << j
+        return mask
+
+    def _make_forward(self, state):
+        x, y = self._cells[state >> 2]
+        dx, dy = ((1, 0), (0, 1), (-1, 0), (0, -1))[state & 3]
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < self.N and 0 <= ny < self.N:
+            return morton_index(nx, ny)
+        return -1
+
+    def table(self, fill):
+        """A per-cell int table (dict) that reads fill until a cell is assigned."""
+        return _DefaultTable(fill)
+
+    def index(self, cell):
+        return morton_index(*cell)
+
+    def cell(self, i):
+        return self._cells[i]
+
+    def expand(self, board):
+        """Every cell adjacent to some cell of board."""
+        nbr_mask = self.nbr_mask
+        out = 0
+        for i in iter_bits(board):
+            out |= nbr_mask[i]
+        return out
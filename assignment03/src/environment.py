@@ -3,24 +3,107 @@
 
 import random
 from action import Action
-from percept import Percept
+from percept import BREEZE_BIT, BUMP_BIT, GLITTER_BIT, SCREAM_BIT, STENCH_BIT, bits_to_percepts
 
 # Directions: 0 = EAST, 1 = NORTH, 2 = WEST, 3 = SOUTH
 DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
 
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(z):
+    """splitmix64 finalizer: a well-spread 64-bit hash of a 64-bit int."""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class _HashedPits:
+    """
+    The pits of a lazily generated world. Cell (x, y) holds a pit when a hash of the
+    world's key and the cell index falls below pit_prob, so every cell is still an
+    independent draw but nothing has to be stored. Supports `cell in pits` only.
+    """
+
+    __slots__ = ("key", "threshold", "grid_size")
+
+    def __init__(self, key, pit_prob, grid_size):
+        self.key = key
+        self.threshold = int(pit_prob * (1 << 64))
+        self.grid_size = grid_size
+
+    def __contains__(self, cell):
+        x, y = cell
+        N = self.grid_size
+        if not (0 <= x < N and 0 <= y < N) or (x, y) == (0, 0):
+            return False
+        return _mix64((self.key + (x * N + y) * 0x9E3779B97F4A7C15) & _MASK64) < self.threshold
+
+    def __repr__(self):
+        return f"<hashed pits, key={self.key:#x}>"
+
+
+class _LazyPercepts(dict):
+    """Stands in for Environment.cell_percepts: breeze/stench bits worked out per cell on first visit."""
+
+    __slots__ = ("env",)
+
+    def __init__(self, env):
+        super().__init__()
+        self.env = env
+
+    def __missing__(self, i):
+        env = self.env
+        x, y = divmod(i, env.grid_size)
+        bits = 0
+        for dx, dy in DIRECTIONS:
+            cell = (x + dx, y + dy)
+            if cell in env.pits:
+                bits |= BREEZE_BIT
+            if cell == env.wumpus_pos:
+                bits |= STENCH_BIT
+        self[i] = bits
+        return bits
+
 
 class Environment:
     """
     Wumpus World environment.
+
+    The layout and lookup tables never change once generated, so everything that does
+    change while the agent plays fits in a small tuple (see snapshot/restore), and
+    clone() shares the layout instead of copying it. Lookahead agents can roll out
+    from a snapshot with step_code, which takes int action codes (Action.value) and
+    returns percept.*_BIT flags.
+
+    With lazy=True nothing is tabulated up front: pits come from a per-cell hash of the
+    seed, the Wumpus and gold are placed by rejection sampling, and percepts are computed
+    (and cached) for the cells the agent actually reaches, so setup and memory don't grow
+    with N * N. Lazy worlds differ from eager ones with the same seed and have no layout().
     """
 
+    __slots__ = (
+        "grid_size", "pit_prob", "max_actions", "num_arrows", "verbosity", "rng",
+        "lazy", "pits", "wumpus_pos", "gold_pos", "neighbor_table", "cell_percepts",
+        # state below here is what snapshot() captures
+        "agent_pos", "agent_dir", "agent_alive", "agent_has_gold", "agent_arrows",
+        "wumpus_alive", "score", "action_count", "bump", "scream", "terminated",
+    )
+
     def __init__(self, grid_size=4, pit_prob=0.2, max_actions=100,
-                 num_arrows=1, seed=12345, verbosity=0):
+                 num_arrows=1, seed=12345, verbosity=0, layout=None, lazy=False):
+        """
+        :param layout: optional (pits, wumpus_pos, gold_pos) to use instead of generating
+                       a world from seed, e.g. one returned by layout() or read back from
+                       a recorded trajectory
+        :param lazy: generate the world on demand (see class docstring); ignored with layout
+        """
         self.grid_size = grid_size
         self.pit_prob = pit_prob
         self.max_actions = max_actions
         self.num_arrows = num_arrows
         self.verbosity = verbosity
+        self.lazy = lazy and layout is None
 
         self.rng = random.Random(seed)
 
@@ -30,6 +113,10 @@ class Environment:
         self.wumpus_pos = None
         self.gold_pos = None
 
+        # Lookup tables built once per world; cells are indexed x * N + y
+        self.neighbor_table = []  # cell index -> tuple of adjacent cell indices
+        self.cell_percepts = bytearray()  # cell index -> BREEZE_BIT | STENCH_BIT
+
         # Agent state
         self.agent_pos = (0, 0)
         self.agent_dir = 0  # EAST
@@ -44,7 +131,21 @@ class Environment:
         self.scream = False
         self.terminated = False
 
-        self._generate_world()
+        if self.lazy:
+            self._generate_lazy_world()
+        elif layout is None:
+            self._generate_world()
+        else:
+            pits, self.wumpus_pos, self.gold_pos = layout
+            self.pits = set(pits)
+            self._build_tables()
+
+    @classmethod
+    def from_bank(cls, bank, index, max_actions=100, num_arrows=1, verbosity=0):
+        """An Environment for world index of a world_bank.WorldBank."""
+        return cls(grid_size=bank.grid_size, pit_prob=bank.pit_prob, max_actions=max_actions,
+                   num_arrows=num_arrows, seed=bank.start_seed + index, verbosity=verbosity,
+                   layout=bank.layout(index))
 
     def _log(self, *args):
         if self.verbosity > 0:
@@ -78,43 +179,83 @@ class Environment:
         ]
         self.gold_pos = self.rng.choice(gold_candidates)
 
+        self._build_tables()
+
         self._log("Pits:", self.pits)
         self._log("Wumpus:", self.wumpus_pos)
         self._log("Gold:", self.gold_pos)
 
-    def _adjacent_cells(self, x, y):
+    def _generate_lazy_world(self):
         N = self.grid_size
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < N and 0 <= ny < N:
-                yield (nx, ny)
+        self.pits = _HashedPits(self.rng.getrandbits(64), self.pit_prob, N)
 
-    def _compute_percepts(self):
-        percepts = set()
+        # Same rules as _generate_world, but by rejection instead of listing every cell
+        def random_cell():
+            while True:
+                cell = (self.rng.randrange(N), self.rng.randrange(N))
+                if cell != (0, 0) and cell not in self.pits:
+                    return cell
 
-        x, y = self.agent_pos
+        self.wumpus_pos = random_cell()
+        self.gold_pos = random_cell()
+        while self.gold_pos == self.wumpus_pos:
+            self.gold_pos = random_cell()
+
+        self.cell_percepts = _LazyPercepts(self)
+
+        self._log("Pits:", self.pits)
+        self._log("Wumpus:", self.wumpus_pos)
+        self._log("Gold:", self.gold_pos)
+
+    def layout(self):
+        """(pits, wumpus_pos, gold_pos) of this world as first generated."""
+        if self.lazy:
+            raise ValueError("a lazily generated world has no explicit layout")
+        return frozenset(self.pits), self.wumpus_pos, self.gold_pos
 
-        # Breeze if adjacent to pit
-        if any((nx, ny) in self.pits for (nx, ny) in self._adjacent_cells(x, y)):
-            percepts.add(Percept.BREEZE)
+    def _build_tables(self):
+        """Precompute neighbor lists and per-cell breeze/stench bits."""
+        N = self.grid_size
+        self.neighbor_table = []
+        for x in range(N):
+            for y in range(N):
+                self.neighbor_table.append(tuple(
+                    nx * N + ny
+                    for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                    if 0 <= nx < N and 0 <= ny < N
+                ))
+
+        self.cell_percepts = bytearray(N * N)
+        for (px, py) in self.pits:
+            for i in self.neighbor_table[px * N + py]:
+                self.cell_percepts[i] |= BREEZE_BIT
+        wx, wy = self.wumpus_pos
+        for i in self.neighbor_table[wx * N + wy]:
+            self.cell_percepts[i] |= STENCH_BIT
+
+    def percept_bits(self):
+        """Current percepts as an int of percept.*_BIT flags."""
+        x, y = self.agent_pos
 
-        # Stench if adjacent to live Wumpus
-        if self.wumpus_alive and any(
-            (nx, ny) == self.wumpus_pos for (nx, ny) in self._adjacent_cells(x, y)
-        ):
-            percepts.add(Percept.STENCH)
+        # Breeze/stench straight from the table; stench only while the Wumpus lives
+        bits = self.cell_percepts[x * self.grid_size + y]
+        if not self.wumpus_alive:
+            bits &= ~STENCH_BIT
 
         # Glitter if on gold
-        if (x, y) == self.gold_pos and not self.agent_has_gold:
-            percepts.add(Percept.GLITTER)
+        if self.agent_pos == self.gold_pos and not self.agent_has_gold:
+            bits |= GLITTER_BIT
 
         # Bump and scream come from last action
         if self.bump:
-            percepts.add(Percept.BUMP)
+            bits |= BUMP_BIT
         if self.scream:
-            percepts.add(Percept.SCREAM)
+            bits |= SCREAM_BIT
 
-        return percepts
+        return bits
+
+    def _compute_percepts(self):
+        return bits_to_percepts(self.percept_bits())
 
     def _move_forward(self):
         x, y = self.agent_pos
@@ -171,53 +312,86 @@ class Environment:
         self.scream = False
         return percepts
 
-    def step(self, action):
+    def get_percept_bits(self):
+        """Same as get_percepts, but as percept.*_BIT flags."""
+        bits = self.percept_bits()
+        self.bump = False
+        self.scream = False
+        return bits
+
+    def forfeit(self):
+        """End the trial immediately with the same penalty as dying."""
+        if self.terminated:
+            return
+        self.score -= 1000
+        self.terminated = True
+        self._log("Agent forfeited. Score:", self.score)
+
+    def snapshot(self):
+        """Everything that changes during play, as a tuple. O(1)."""
+        return (self.agent_pos, self.agent_dir, self.agent_alive, self.agent_has_gold,
+                self.agent_arrows, self.wumpus_alive, self.score, self.action_count,
+                self.bump, self.scream, self.terminated)
+
+    def restore(self, state):
+        """Put the world back to a snapshot() taken from this environment (or a clone)."""
+        (self.agent_pos, self.agent_dir, self.agent_alive, self.agent_has_gold,
+         self.agent_arrows, self.wumpus_alive, self.score, self.action_count,
+         self.bump, self.scream, self.terminated) = state
+
+    def clone(self):
+        """A copy that shares the (read-only) layout and tables with this one."""
+        env = Environment.__new__(Environment)
+        for name in Environment.__slots__:
+            setattr(env, name, getattr(self, name))
+        return env
+
+    # One handler per action; indexed by Action.value in _ACTION_HANDLERS below
+
+    def _act_move_forward(self):
+        self._move_forward()
+        self._check_death()
+
+    def _act_grab(self):
+        if self.agent_pos == self.gold_pos and not self.agent_has_gold:
+            self.agent_has_gold = True
+            self._log("Gold grabbed!")
+
+    def _act_shoot(self):
+        self.score -= 10  # cost of arrow
+        self._shoot()
+
+    def _act_climb(self):
+        if self.agent_pos == (0, 0):
+            # Exit; if has gold, big reward
+            if self.agent_has_gold:
+                self.score += 1000
+            self.terminated = True
+            self._log("Agent climbed out. Score:", self.score)
+
+    def _act_no_op(self):
+        # Do nothing; could be used to signal done
+        pass
+
+    def step_code(self, code):
         """
-        Apply an action and update the world.
-        Returns: (percepts, done)
+        Apply an action given as an int code (Action.value) and update the world.
+        Returns: (percept bits, done)
         """
         if self.terminated:
-            return set(), True
+            return 0, True
 
         self.action_count += 1
         self.score -= 1  # cost for each action
 
-        self._log("Action:", action.name, "Pos:", self.agent_pos, "Dir:", self.agent_dir)
+        if self.verbosity > 0:
+            self._log("Action:", Action(code).name, "Pos:", self.agent_pos, "Dir:", self.agent_dir)
 
         # Reset bump/scream for this action
         self.bump = False
         self.scream = False
 
-        if action == Action.MOVE_FORWARD:
-            self._move_forward()
-            self._check_death()
-
-        elif action == Action.TURN_LEFT:
-            self._turn_left()
-
-        elif action == Action.TURN_RIGHT:
-            self._turn_right()
-
-        elif action == Action.GRAB:
-            if self.agent_pos == self.gold_pos and not self.agent_has_gold:
-                self.agent_has_gold = True
-                self._log("Gold grabbed!")
-
-        elif action == Action.SHOOT:
-            self.score -= 10  # cost of arrow
-            self._shoot()
-
-        elif action == Action.CLIMB:
-            if self.agent_pos == (0, 0):
-                # Exit; if has gold, big reward
-                if self.agent_has_gold:
-                    self.score += 1000
-                self.terminated = True
-                self._log("Agent climbed out. Score:", self.score)
-
-        elif action == Action.NO_OP:
-            # Do nothing; could be used to signal done
-            pass
+        _ACTION_HANDLERS[code](self)
 
         # Check death if moved
         if not self.agent_alive:
@@ -230,6 +404,27 @@ class Environment:
             self._log("Max actions reached.")
             self.terminated = True
 
-        percepts = self._compute_percepts()
-        done = self.terminated
-        return percepts, done
+        return self.percept_bits(), self.terminated
+
+    def step(self, action):
+        """
+        Apply an action and update the world.
+        Returns: (percepts, done)
+        """
+        if self.terminated:
+            return set(), True
+        bits, done = self.step_code(action.value)
+        return bits_to_percepts(bits), done
+
+
+_ACTION_HANDLERS = [None] * (max(a.value for a in Action) + 1)
+for _action, _handler in (
+    (Action.MOVE_FORWARD, Environment._act_move_forward),
+    (Action.TURN_LEFT, Environment._turn_left),
+    (Action.TURN_RIGHT, Environment._turn_right),
+    (Action.GRAB, Environment._act_grab),
+    (Action.SHOOT, Environment._act_shoot),
+    (Action.CLIMB, Environment._act_climb),
+    (Action.NO_OP, Environment._act_no_op),
+):
+    _ACTION_HANDLERS[_action.value] = _handler
@@ -0,0 +1,190 @@
+# CS 452/552 - Assignment 3
+# Name: Benjamin Zignego
+
+from bitboard import iter_bits
+
+
+class FrontierInference:
+    """
+    Pit and Wumpus probabilities for the unknown cells next to where the agent has been.
+
+    Pits: every cell except (0,0) holds a pit independently with pit_prob. Each breezy
+    cell we visited says "at least one of my unknown neighbors is a pit", and each visited
+    cell without a breeze says none of its neighbors is (even if it had a stench, so
+    those cells aren't in the agent's safe set yet). The frontier
+    cells are split into independent components (cells linked through a shared breeze),
+    and each component is solved exactly by weighted model counting. Results are cached
+    by the component's constraints, so components that didn't change since the last
+    call are not enumerated again.
+
+    Wumpus: there is exactly one, so the candidates are the cells next to every smelly
+    cell and next to no stench-free visited cell. Each candidate is equally likely.
+
+    Sets of cells are bitboards over a bitboard.Grid.
+    """
+
+    # Components bigger than this are approximated instead of enumerated (2^k worst case)
+    MAX_EXACT = 18
+
+    # Drop the cache when it gets this big; the agent only ever needs the recent entries
+    MAX_CACHE = 4096
+
+    def __init__(self, pit_prob, grid):
+        """
+        :param pit_prob: prior probability of a pit in any cell
+        :param grid: bitboard.Grid the agent's belief state is indexed by
+        """
+        self.pit_prob = pit_prob
+        self.grid = grid
+        self._cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def pit_probabilities(self, breezy, pit_free):
+        """
+        :param breezy: visited cells where we felt a breeze
+        :param pit_free: cells known to be pit-free (safe cells plus every neighbor of a
+                         visited cell without a breeze)
+        :return: dict cell index -> P(pit) for every unknown cell next to a breezy cell
+        """
+        nbr_mask = self.grid.nbr_mask
+        constraints = set()
+        for b in iter_bits(breezy):
+            # pit_free is taken out here, so the constraints (the cache key) reflect it
+            con = nbr_mask[b] & ~pit_free
+            if con:
+                constraints.add(con)
+
+        # Group constraints that share a cell. Existing groups are disjoint from each other,
+        # so a group joins the new constraint's component only by overlapping it directly.
+        groups = []
+        for con in constraints:
+            mask = con
+            cons = [con]
+            rest = []
+            for g_mask, g_cons in groups:
+                if g_mask & con:
+                    mask |= g_mask
+                    cons.extend(g_cons)
+                else:
+                    rest.append((g_mask, g_cons))
+            rest.append((mask, cons))
+            groups = rest
+
+        probs = {}
+        for mask, cons in groups:
+            cells = tuple(iter_bits(mask))
+            key = frozenset(cons)
+            marginals = self._cache.get(key)
+            if marginals is None:
+                self.cache_misses += 1
+                if len(cells) <= FrontierInference.MAX_EXACT:
+                    marginals = self._count_models(cells, cons)
+                else:
+                    marginals = self._approximate(cells, cons)
+                if len(self._cache) >= FrontierInference.MAX_CACHE:
+                    self._cache.clear()
+                self._cache[key] = marginals
+            else:
+                self.cache_hits += 1
+            probs.update(zip(cells, marginals))
+        return probs
+
+    def _count_models(self, cells, cons):
+        """Exact P(pit) per cell: sum the prior weight of every assignment that explains the breezes."""
+        p = self.pit_prob
+        q = 1.0 - p
+        k = len(cells)
+        index = {c: i for i, c in enumerate(cells)}
+
+        # Check each constraint as soon as its last cell is assigned
+        closing = [[] for _ in range(k)]
+        for con in cons:
+            idx = tuple(index[c] for c in iter_bits(con))
+            closing[max(idx)].append(idx)
+
+        assign = [False] * k
+        weight_with = [0.0] * k
+        total = 0.0
+
+        def dfs(i, weight):
+            nonlocal total
+            if i == k:
+                total += weight
+                for j in range(k):
+                    if assign[j]:
+                        weight_with[j] += weight
+                return
+            for val in (True, False):
+                assign[i] = val
+                if all(any(assign[j] for j in idx) for idx in closing[i]):
+                    dfs(i + 1, weight * (p if val else q))
+            assign[i] = False
+
+        dfs(0, 1.0)
+        if total == 0.0:
+            # Inconsistent observations; fall back to the prior
+            return tuple(p for _ in cells)
+        return tuple(w / total for w in weight_with)
+
+    def _approximate(self, cells, cons):
+        """Each cell conditioned only on its most telling breeze; used for huge components."""
+        p = self.pit_prob
+        q = 1.0 - p
+        best = {c: p for c in cells}
+        for con in cons:
+            prob = p / (1.0 - q ** con.bit_count())
+            for c in iter_bits(con):
+                if prob > best[c]:
+                    best[c] = prob
+        return tuple(best[c] for c in cells)
+
+    def wumpus_probabilities(self, smelly, clean, safe):
+        """
+        :param smelly: visited cells where we smelled the Wumpus
+        :param clean: visited cells with no stench
+        :param safe: cells known not to hold the Wumpus
+        :return: dict cell index -> P(wumpus) for the remaining candidates (absent cells
+                 are 0 as long as they are next to a visited cell)
+        """
+        if not smelly:
+            return {}
+        nbr_mask = self.grid.nbr_mask
+        candidates = -1  # every cell, until the first stench narrows it down
+        for s in iter_bits(smelly):
+            candidates &= nbr_mask[s]
+        for c in iter_bits(clean):
+            candidates &= ~nbr_mask[c]
+        candidates &= ~safe & ~1  # never at (0,0)
+        if not candidates:
+            return {}
+        p = 1.0 / candidates.bit_count()
+        return {c: p for c in iter_bits(candidates)}
+
+    def risks(self, breezy, smelly, visited, safe, wumpus_alive=True):
+        """
+        P(death) for stepping into each unknown cell next to a breezy or smelly cell.
+        :return: (dict cell index -> risk, bitboard of cells proven safe)
+        """
+        nbr_mask = self.grid.nbr_mask
+        pit_free = safe | visited
+        for c in iter_bits(visited & ~breezy):
+            pit_free |= nbr_mask[c]
+        pits = self.pit_probabilities(breezy, pit_free)
+        wumpus = {}
+        if wumpus_alive:
+            wumpus = self.wumpus_probabilities(smelly, visited & ~smelly, safe)
+
+        near_stench = 0
+        for s in iter_bits(smelly):
+            near_stench |= self.grid.nbr_mask[s]
+        near_stench &= ~safe
+
+        risk = {}
+        proven_safe = 0
+        for cell in set(pits) | set(wumpus) | set(iter_bits(near_stench)):
+            r = 1.0 - (1.0 - pits.get(cell, 0.0)) * (1.0 - wumpus.get(cell, 0.0))
+            risk[cell] = r
+            if r == 0.0:
+                proven_safe |= 1 << cell
+        return risk, proven_safe
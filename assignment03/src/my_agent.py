@@ -3,194 +3,324 @@
 from agent import Agent
 from action import Action
 from percept import Percept
+from bitboard import Grid, SparseGrid, iter_bits
+from inference import FrontierInference
 from collections import deque
+import heapq
 
 class MyAgent(Agent):
     """
     Rule-based Wumpus World agent.
 
     Strategy: 
-    - Maintain internal map state:
+    - Maintain internal map state, each one an int bitboard over self.grid (bit x * N + y,
+      or a Z-order index on very large boards, see bitboard.SparseGrid):
         - visited: cells we've been to
         - safe: cells we believe are safe
         - possible_risky: cells adjacent to a breeze/stench (don't move there unless needed)
-        - walls: cells outside the grid (discovered by bump)
-    - Keep track of our estimated position and orientation.
+        - breezy / smelly: visited cells where we felt a breeze / smelled the Wumpus
+        - deadly: cells proven to hold a pit or the Wumpus (never entered, not even when
+          gambling or heading home through the unknown)
+      Walls need no bookkeeping: the neighbor tables already stop at the edge of the grid.
+    - Keep track of our estimated position (a cell index) and orientation.
     - If GLITTER: GRAB, then plan path back to (0,0) and CLIMB.
-    - Exploration: plan a shortest path (BFS) to the nearest safe, unvisited cell.
-    - Movement: translate planned path into a small sequence of Actions (turns + move_forwards).
+    - Exploration: plan the cheapest route (A* over cell + heading, so turns count
+      as much as moves) to the nearest safe, unvisited cell.
+      The safe-unvisited frontier (safe & ~visited) and the unknown fringe are a couple
+      of bitwise operations; the distance field back to (0,0) is kept up to date as
+      cells become safe instead of being rebuilt on every replan.
+    - Movement: the planner hands back the Actions directly (turns + move_forwards).
+    - Budget: don't start an exploration leg we can't come back from before max_actions.
+    - Out of safe moves: work out exact pit/Wumpus probabilities for the cells next to
+      where we've been (inference.py). Anything proven safe gets explored; otherwise
+      step into the least risky cell if the risk is low enough, else go home.
     - Update internal state on each call to next_action using the latest percepts and the last action taken.
     """
 
     # Directions: 0 = EAST, 1 = NORTH, 2 = WEST, 3 = SOUTH
     DIR_VECTORS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
 
+    # Above this many goals the A* heuristic costs more than it saves; fall back to Dijkstra
+    HEURISTIC_GOAL_LIMIT = 16
+
+    # Highest probability of dying we'll accept for a step into the unknown on a 4x4 board.
+    # Bigger boards usually need several gambles to reach the gold, so the limit shrinks with N.
+    RISK_LIMIT = 0.25
+
+    # Boards bigger than this use a SparseGrid, so setup doesn't cost N * N
+    SPARSE_ABOVE = 128
+
     def initialize(self, grid_size, num_arrows, **kwargs):
         # World parameters
         self.N = grid_size
         self.num_arrows = num_arrows
         self.max_actions = kwargs.get("max_actions", None)
+        self.pit_prob = kwargs.get("pit_prob", 0.2)
+        self.risk_limit = MyAgent.RISK_LIMIT * 4 / grid_size
         self.verbosity = kwargs.get("verbosity", 0)
-
-        # Internal belief state
-        self.visited = set()
-        self.safe = set()
-        self.possible_risky = set()  # cells that might have pit/wumpus (adjacent to breeze/stench)
-        self.walls = set()  # cells outside grid discovered by bump (we mark forward cell as wall)
+        sparse = kwargs.get("sparse") or grid_size > MyAgent.SPARSE_ABOVE
+        self.grid = SparseGrid(grid_size) if sparse else Grid(grid_size)
+
+        # Internal belief state (bitboards)
+        self.visited = 0
+        self.safe = 0
+        self.possible_risky = 0  # cells that might have pit/wumpus (adjacent to breeze/stench)
+        self.breezy = 0
+        self.smelly = 0
+        self.deadly = 0
+        self.wumpus_alive = True
+        self.inference = FrontierInference(self.pit_prob, self.grid)
         self.has_gold = False
 
+        # Steps to (0,0) through safe cells, -1 where unknown
+        self.home_dist = self.grid.table(-1)
+
         # Agent internal state estimate
-        self.pos = (0, 0)
+        self.pos = self.grid.index((0, 0))
         self.dir = 0  # EAST
 
         # Mark start as safe/visited
-        self.safe.add(self.pos)
-        self.visited.add(self.pos)
+        self.mark_safe(1 << self.pos)
+        self.mark_visited(self.pos)
 
         # Action planning queue
         self.action_queue = deque()
 
         # For processing effects of the previous step like new percepts
         self.last_action = None
+        self.actions_taken = 0
 
         if self.verbosity > 0:
             print("[AGENT INIT] grid_size", self.N, "arrows", self.num_arrows)
 
 
-    # Helpers
-    def in_bounds(self, cell):
-        x, y = cell
-        return 0 <= x < self.N and 0 <= y < self.N
-
-
-    # Keep track of the cells adjacent to us
-    def neighbors(self, cell):
-        x, y = cell
-        for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.N and 0 <= ny < self.N:
-                yield (nx, ny)
-
-
-    # What cell is in front of us
-    def forward_cell(self):
-        dx, dy = MyAgent.DIR_VECTORS[self.dir]
-        x, y = self.pos
-        return (x + dx, y + dy)
-
-
-    # To translate a direction into turn actions
-    def face_direction_actions(self, target_dir):
-        diff = (target_dir - self.dir) % 4
-        if diff == 0:
-            return []
-        if diff == 1:
-            return [Action.TURN_LEFT]
-        if diff == 2:
-            # two lefts (or two rights)
-            return [Action.TURN_LEFT, Action.TURN_LEFT]
-        if diff == 3:
-            return [Action.TURN_RIGHT]
-
-
-    # What direction the destination cell is from us
-    def dir_to(self, from_cell, to_cell):
-        fx, fy = from_cell
-        tx, ty = to_cell
-        dx, dy = tx - fx, ty - fy
-        for i, (vx, vy) in enumerate(MyAgent.DIR_VECTORS):
-            if (dx, dy) == (vx, vy):
-                return i
-        return None
+    # Safe cells we haven't been to yet
+    def frontier(self):
+        return self.safe & ~self.visited
 
 
-    # Put appropriate actions in the queue to follow a path
-    def enqueue_path_actions(self, path):
-        if not path or len(path) < 2:
-            return
-        for i in range(len(path) - 1):
-            cur = path[i]
-            nxt = path[i + 1]
-            needed_dir = self.dir_to(cur, nxt)
-            if needed_dir is None:
-                continue
-            turns = self.face_direction_actions(needed_dir)
-            for t in turns:
-                self.action_queue.append(t)
-            self.action_queue.append(Action.MOVE_FORWARD)
+    # Unknown (not safe/risky) cells next to a safe cell
+    def fringe(self):
+        return self.grid.expand(self.safe) & ~self.safe & ~self.possible_risky & ~self.deadly
 
 
-    # Use BFS search to find the shortest safe path
-    # Allow unknown is whether we should stick to what we know
-    def bfs_shortest_path(self, start, goals, allow_unknown=False):
-        q = deque()
-        q.append(start)
-        parent = {start: None}
-        visited = {start}
-        while q:
-            cur = q.popleft()
-            if cur in goals:
-                # reconstruct path
-                path = []
-                node = cur
-                while node is not None:
-                    path.append(node)
-                    node = parent[node]
-                path.reverse()
-                return path
-            for nb in self.neighbors(cur):
-                if nb in visited:
+    # Bookkeeping for cells we now know are safe (a bitboard)
+    def mark_safe(self, cells):
+        new = cells & ~self.safe
+        if not new:
+            return
+        self.safe |= new
+
+        # Grow the distance field to home; a new safe cell can only shorten
+        # distances, so relax outward from it until nothing improves
+        home_dist = self.home_dist
+        nbrs = self.grid.nbrs
+        for cell in iter_bits(new):
+            if cell == 0:
+                home_dist[cell] = 0
+            else:
+                known = [home_dist[nb] for nb in nbrs[cell] if home_dist[nb] >= 0]
+                if not known:
                     continue
-                if nb in self.walls:
+                best = min(known) + 1
+                if 0 <= home_dist[cell] <= best:
                     continue
-                if nb in self.safe or (allow_unknown and nb not in self.possible_risky):
-                    visited.add(nb)
-                    parent[nb] = cur
-                    q.append(nb)
+                home_dist[cell] = best
+            q = deque([cell])
+            while q:
+                cur = q.popleft()
+                d = home_dist[cur] + 1
+                for nb in nbrs[cur]:
+                    if (self.safe >> nb) & 1 and not 0 <= home_dist[nb] <= d:
+                        home_dist[nb] = d
+                        q.append(nb)
+
+
+    def mark_visited(self, cell):
+        self.visited |= 1 << cell
+
+
+    # Fewest turns needed to make net progress (dx, dy) starting out facing d.
+    # Every direction we need to move in has to be faced at some point.
+    @staticmethod
+    def min_turns(d, dx, dy):
+        needed = []
+        if dx:
+            needed.append(0 if dx > 0 else 2)
+        if dy:
+            needed.append(1 if dy > 0 else 3)
+        if not needed:
+            return 0
+        turns = [min((n - d) % 4, (d - n) % 4) for n in needed]
+        if len(turns) == 1:
+            return turns[0]
+        # the two needed directions are perpendicular: face the closer one, then one more turn
+        return min(turns) + 1
+
+
+    # A* over (cell, heading) states where moves and turns both cost one action.
+    # goals is a bitboard; states are packed as cell * 4 + heading.
+    # Returns the cheapest list of Actions that ends in any goal cell, or None.
+    # Allow unknown is whether we should stick to what we know
+    def plan_path(self, goals, allow_unknown=False):
+        cell_of = self.grid.cell
+        home_only = goals == 1 and not allow_unknown
+        goal_list = None
+        if goals.bit_count() <= MyAgent.HEURISTIC_GOAL_LIMIT:
+            goal_list = [cell_of(g) for g in iter_bits(goals)]
+
+        def h(cell, d):
+            x, y = cell_of(cell)
+            if home_only and self.home_dist[cell] >= 0:
+                # exact safe-path length home, plus the turns we can't avoid
+                return self.home_dist[cell] + MyAgent.min_turns(d, -x, -y)
+            if goal_list is None:
+                return 0
+            return min(abs(gx - x) + abs(gy - y) + MyAgent.min_turns(d, gx - x, gy - y)
+                       for gx, gy in goal_list)
+
+        passable = self.safe | goals
+        if allow_unknown:
+            # an infinite bitboard; the forward table never leads off the grid
+            passable |= ~(self.possible_risky | self.deadly)
+        forward = self.grid.forward
+
+        start = self.pos * 4 + self.dir
+        best = {start: 0}
+        parent = {start: None}
+        tie = 0
+        heap = [(h(self.pos, self.dir), 0, tie, start)]
+        while heap:
+            _, g, _, state = heapq.heappop(heap)
+            if g > best[state]:
+                continue
+            cell = state >> 2
+            if (goals >> cell) & 1:
+                actions = []
+                while parent[state] is not None:
+                    state, act = parent[state]
+                    actions.append(act)
+                actions.reverse()
+                return actions
+
+            d = state & 3
+            base = state - d
+            steps = [(base + (d + 1) % 4, Action.TURN_LEFT), (base + (d - 1) % 4, Action.TURN_RIGHT)]
+            fwd = forward[state]
+            if fwd >= 0 and (passable >> fwd) & 1:
+                steps.append((fwd * 4 + d, Action.MOVE_FORWARD))
+            for nxt, act in steps:
+                if g + 1 < best.get(nxt, g + 2):
+                    best[nxt] = g + 1
+                    parent[nxt] = (state, act)
+                    tie += 1
+                    heapq.heappush(heap, (g + 1 + h(nxt >> 2, nxt & 3), g + 1, tie, nxt))
         return None
 
 
+    # Rough lower bound on actions to get home from cell and climb out
+    def cost_home_from(self, cell):
+        if self.home_dist[cell] >= 0:
+            return self.home_dist[cell] + 1
+        dists = [self.home_dist[nb] for nb in self.grid.nbrs[cell] if self.home_dist[nb] >= 0]
+        if dists:
+            return min(dists) + 2
+        x, y = self.grid.cell(cell)
+        return x + y + 1
+
+
+    # Do we still have time to do this many actions and then make it home?
+    def within_budget(self, cost, end_cell):
+        if self.max_actions is None:
+            return True
+        remaining = self.max_actions - self.actions_taken
+        return cost + self.cost_home_from(end_cell) <= remaining
+
+
+    # Queue the cheapest route into any of goals, if there is one and we can afford it
+    def plan_leg(self, goals):
+        if not goals:
+            return False
+        actions = self.plan_path(goals)
+        if actions is None:
+            return False
+        if not self.within_budget(len(actions), self.cell_after(actions)):
+            # Not enough actions left to go there and come back: call it a day
+            if self.verbosity > 0:
+                print("[AGENT] out of action budget for exploring, heading home")
+            return self.plan_return_home_and_climb()
+        self.action_queue.extend(actions)
+        return True
+
+
+    # Ask the inference engine about the unknown cells we border.
+    # Marks proven safe/deadly cells and returns the cell -> P(death) table.
+    def update_risks(self):
+        risk, proven_safe = self.inference.risks(
+            self.breezy, self.smelly, self.visited, self.safe, self.wumpus_alive)
+        self.mark_safe(proven_safe)
+        for cell, r in risk.items():
+            if r >= 1.0:
+                self.deadly |= 1 << cell
+        if self.verbosity > 1:
+            print("[AGENT] risks:", {self.grid.cell(c): round(r, 3) for c, r in risk.items()})
+        return risk
+
+
     # Reason about the next safest unvisited cell to visit
     def plan_explore(self):
-        # Candidate goals are safe but not visited
-        goals = {cell for cell in self.safe if cell not in self.visited}
-        if goals:
-            path = self.bfs_shortest_path(self.pos, goals)
-            if path:
-                self.enqueue_path_actions(path)
-                return True
+        # Candidate goals are safe but not visited; failing that, step into the closest unknown
+        # cell that isn't marked risky. Any unknown cell reached first by the search borders a
+        # safe cell, so the fringe is the whole goal set.
+        if self.plan_leg(self.frontier()) or self.plan_leg(self.fringe()):
+            return True
 
-        # If no safe unvisited, consider unknown neighbors that aren't marked risky/walls
-        unknown_cells = []
-        for x in range(self.N):
-            for y in range(self.N):
-                c = (x, y)
-                if c in self.visited or c in self.walls:
-                    continue
-                if c not in self.safe and c not in self.possible_risky:
-                    unknown_cells.append(c)
-        if unknown_cells:
-            path = self.bfs_shortest_path(self.pos, set(unknown_cells), allow_unknown=True)
-            if path:
-                self.enqueue_path_actions(path)
+        # No safe moves left: see what the percepts actually prove
+        risk = self.update_risks()
+        if self.plan_leg(self.frontier()):
+            return True
+
+        # Still nothing safe: take the least risky step if it's a risk worth taking
+        x, y = self.grid.cell(self.pos)
+        candidates = []
+        for cell, r in risk.items():
+            if r < self.risk_limit and not ((self.safe | self.deadly) >> cell) & 1:
+                cx, cy = self.grid.cell(cell)
+                candidates.append((r, abs(cx - x) + abs(cy - y), cell))
+        for r, _, cell in sorted(candidates):
+            if self.plan_leg(1 << cell):
+                if self.verbosity > 0:
+                    print(f"[AGENT] gambling on {self.grid.cell(cell)} (risk {r:.2f})")
                 return True
 
         # Nothing to explore: fallback to return to start if not there
-        if self.pos != (0, 0):
-            path = self.bfs_shortest_path(self.pos, {(0, 0)})
-            if path:
-                self.enqueue_path_actions(path)
-                return True
+        if self.pos != 0:
+            return self.plan_return_home_and_climb()
 
         # No plan possible
         return False
 
 
+    # Where a sequence of actions leaves us (assumes no bumps)
+    def cell_after(self, actions):
+        cell, d = self.pos, self.dir
+        for act in actions:
+            if act == Action.MOVE_FORWARD:
+                cell = self.grid.forward[cell * 4 + d]
+            elif act == Action.TURN_LEFT:
+                d = (d + 1) % 4
+            elif act == Action.TURN_RIGHT:
+                d = (d - 1) % 4
+        return cell
+
+
     # Plan the path back to (0, 0) and climb out
     def plan_return_home_and_climb(self):
-        path = self.bfs_shortest_path(self.pos, {(0, 0)})
-        if path:
-            self.enqueue_path_actions(path)
+        actions = self.plan_path(1)
+        if actions is not None:
+            # whatever was queued was planned from somewhere else
+            self.action_queue.clear()
+            self.action_queue.extend(actions)
             self.action_queue.append(Action.CLIMB)
             return True
         return False
@@ -200,7 +330,7 @@ class MyAgent(Agent):
     def process_last_action(self, percepts):
         """
         Use last_action and the returned percepts to update internal state:
-        - If last action was MOVE_FORWARD and BUMP is in percepts: forward cell is wall
+        - If last action was MOVE_FORWARD and BUMP is in percepts: we hit a wall, stay put
         - If no BUMP: update self.pos to forward cell
         - If last_action was TURN_LEFT / TURN_RIGHT: update self.dir.
         - If last_action was GRAB: if we previously perceived GLITTER, assume we now have gold.
@@ -209,24 +339,17 @@ class MyAgent(Agent):
             return
 
         if self.last_action == Action.MOVE_FORWARD:
+            fcell = self.grid.forward[self.pos * 4 + self.dir]
             if Percept.BUMP in percepts:
-                fcell = self.forward_cell()
-                if not self.in_bounds(fcell):
-                    self.walls.add(fcell)
-                else:
-                    # sanity check
-                    self.walls.add(fcell)
                 if self.verbosity > 1:
-                    print("[AGENT] bump at", self.pos, "forward:", fcell, "marked as wall")
-            else:
+                    print("[AGENT] bump at", self.grid.cell(self.pos), "facing", self.dir)
+            elif fcell >= 0:
                 # Update position
-                fcell = self.forward_cell()
-                if self.in_bounds(fcell):
-                    self.pos = fcell
-                    self.visited.add(self.pos)
-                    self.safe.add(self.pos)
-                    if self.verbosity > 1:
-                        print("[AGENT] moved to", self.pos)
+                self.pos = fcell
+                self.mark_safe(1 << self.pos)
+                self.mark_visited(self.pos)
+                if self.verbosity > 1:
+                    print("[AGENT] moved to", self.grid.cell(self.pos))
         elif self.last_action == Action.TURN_LEFT:
             self.dir = (self.dir + 1) % 4
             if self.verbosity > 1:
@@ -254,34 +377,42 @@ class MyAgent(Agent):
             # We're on gold (and we haven't grabbed it yet)
             # Do not change adjacency info just for glitter
             if self.verbosity > 0:
-                print("[AGENT] GLITTER perceived at", self.pos)
+                print("[AGENT] GLITTER perceived at", self.grid.cell(self.pos))
         if Percept.BREEZE in percepts:
             # We're close to a pit
             if self.verbosity > 0:
-                print("[AGENT] BREEZE perceived at", self.pos)
+                print("[AGENT] BREEZE perceived at", self.grid.cell(self.pos))
         if Percept.STENCH in percepts:
             # We're close to a Wumpus
             if self.verbosity > 0:
-                print("[AGENT] STENCH perceived at", self.pos)
+                print("[AGENT] STENCH perceived at", self.grid.cell(self.pos))
 
         has_breeze = Percept.BREEZE in percepts
         has_stench = Percept.STENCH in percepts
-
-        neighbors = list(self.neighbors(self.pos))
+        here = 1 << self.pos
+        if has_breeze:
+            self.breezy |= here
+        if has_stench:
+            self.smelly |= here
+        if Percept.SCREAM in percepts:
+            self.wumpus_alive = False
+            # the Wumpus' cell is fine now; pits get proven again on the next update_risks
+            self.deadly = 0
+
+        neighbors = self.grid.nbr_mask[self.pos]
         if not has_breeze and not has_stench:
             # Neighbors are safe
-            for nb in neighbors:
-                if nb not in self.walls:
-                    self.safe.add(nb)
+            self.mark_safe(neighbors)
         else:
             # Mark unvisited neighbors as possibly risky
-            for nb in neighbors:
-                if nb not in self.visited and nb not in self.safe:
-                    self.possible_risky.add(nb)
+            self.possible_risky |= neighbors & ~self.visited & ~self.safe
 
 
     # Choose next action
     def next_action(self, percepts):
+        if self.last_action is not None:
+            self.actions_taken += 1
+
         # Process effect of the last action
         self.process_last_action(percepts)
 
@@ -291,13 +422,12 @@ class MyAgent(Agent):
         # If we perceive GLITTER and don't already have gold, grab it now and then plan to go home
         if Percept.GLITTER in percepts and not self.has_gold:
             if self.verbosity > 0:
-                print("[AGENT] planning to GRAB gold at", self.pos)
-            self.action_queue.append(Action.GRAB)
-            # After grabbing, we'll plan path home on subsequent calls (we set has_gold in process_last_action)
-            self.last_action = None
-            next_act = self.action_queue.popleft()
-            self.last_action = next_act
-            return next_act
+                print("[AGENT] planning to GRAB gold at", self.grid.cell(self.pos))
+            # Drop the rest of whatever path brought us here; after grabbing, we'll plan
+            # the path home on the next call (we set has_gold in process_last_action)
+            self.action_queue.clear()
+            self.last_action = Action.GRAB
+            return Action.GRAB
 
         # If we have gold and haven't planned return-and-climb
         if self.has_gold and Action.CLIMB not in self.action_queue:
@@ -318,19 +448,19 @@ class MyAgent(Agent):
             return act
 
         # If we are at start and have gold: climb
-        if self.pos == (0, 0) and self.has_gold:
+        if self.pos == 0 and self.has_gold:
             self.last_action = Action.CLIMB
             return Action.CLIMB
 
         # Climb if nothing left to explore
-        if self.pos == (0, 0):
+        if self.pos == 0:
             self.last_action = Action.CLIMB
             return Action.CLIMB
 
         # Try to go home using any allowed nodes
-        path = self.bfs_shortest_path(self.pos, {(0, 0)}, allow_unknown=True)
-        if path:
-            self.enqueue_path_actions(path)
+        actions = self.plan_path(1, allow_unknown=True)
+        if actions:
+            self.action_queue.extend(actions)
             if self.action_queue:
                 act = self.action_queue.popleft()
                 self.last_action = act
@@ -341,7 +471,17 @@ class MyAgent(Agent):
         return Action.NO_OP
 
 
+    def action_overridden(self, action):
+        # The move we planned never happened: believe the action that did, and replan
+        # from where we really are since the rest of the queue assumed it went through
+        if self.verbosity > 0:
+            print(f"[AGENT] {self.last_action.name} was replaced by {action.name}, replanning")
+        self.last_action = action
+        self.action_queue.clear()
+
+
     def game_over(self, score):
         if self.verbosity > 0:
-            print(f"[AGENT] game over. Score: {score}. Visited: {len(self.visited)} cells. Has gold: {self.has_gold}")
+            print(f"[AGENT] game over. Score: {score}. Visited: {self.visited.bit_count()} cells. Has gold: {self.has_gold}")
+            print(f"[AGENT] inference cache: {self.inference.cache_hits} hits, {self.inference.cache_misses} misses")
 
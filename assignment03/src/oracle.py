@@ -0,0 +1,155 @@
+# CS 452/552 - Assignment 3
+# Name: Benjamin Zignego
+
+import argparse
+import time
+from functools import lru_cache
+from multiprocessing import Pool
+
+from bitboard import Grid
+from environment import Environment
+
+
+@lru_cache(maxsize=None)
+def _grid(N):
+    return Grid(N)
+
+
+@lru_cache(maxsize=100000)
+def best_score(grid_size, pits, wumpus_pos, gold_pos, max_actions, num_arrows=1):
+    """
+    Best score an agent that could see the whole layout would get.
+
+    Uniform-cost search over (cell, heading, has gold, Wumpus killed) where every action
+    costs 1 point and shooting 10 more. Whether the Wumpus is dead is part of the state,
+    so within a state the action count is the cost minus a fixed 10 for the shot, and the
+    cheapest way into a state is also the one with the fewest actions. The first time
+    we're home holding the gold within max_actions is therefore the best win; a cheaper
+    win that runs over the limit is skipped and the search goes on, since a costlier one
+    (shooting instead of walking around the Wumpus) can need fewer actions. With no win
+    that fits, the best move is to climb straight out for -1. Moves that bump,
+    die or miss with the arrow are never part of an optimal plan, so they aren't
+    generated, and a second arrow is never worth shooting.
+
+    Costs are small ints, so the frontier is a list of buckets indexed by cost
+    (Dial's algorithm) instead of a heap.
+
+    :param pits: frozenset of pit cells (hashable so results are memoized per world)
+    """
+    N = grid_size
+    grid = _grid(N)
+    forward = grid.forward
+    pit = bytearray(N * N)
+    for cell in pits:
+        pit[grid.index(cell)] = 1
+    wumpus = grid.index(wumpus_pos)
+    gold = grid.index(gold_pos)
+
+    # fire[cell * 4 + d]: shooting from cell facing d hits the Wumpus.
+    # Walk backwards from the Wumpus along each heading.
+    fire = bytearray(N * N * 4)
+    for d in range(4):
+        cell = wumpus
+        while cell >= 0:
+            fire[cell * 4 + d] = 1
+            cell = forward[cell * 4 + (d + 2) % 4]
+
+    # state = (cell * 4 + heading) * 4 + 2 * has_gold + killed
+    INF = 1 << 30
+    dist = [INF] * (N * N * 16)
+    dist[0] = 0
+    buckets = [[0]]
+    cost = 0
+    while cost < len(buckets):
+        for state in buckets[cost]:
+            if dist[state] != cost:
+                continue
+            flags = state & 3
+            has_gold = flags & 2
+            killed = flags & 1
+            pose = state >> 2
+            cell = pose >> 2
+            d = pose & 3
+
+            if cell == 0 and has_gold:
+                # One shot means 10 of the points weren't actions
+                actions = cost - 10 if killed else cost
+                if actions + 1 <= max_actions:
+                    return 1000 - cost - 1  # climb out
+                continue  # too many actions; a shot may still get home in fewer
+
+            base = (pose - d) * 4
+            nexts = [base + ((d + 1) % 4) * 4 + flags, base + ((d - 1) % 4) * 4 + flags]
+            ahead = forward[pose]
+            if ahead >= 0 and not pit[ahead] and (killed or ahead != wumpus):
+                nexts.append((ahead * 4 + d) * 4 + flags)
+            if cell == gold and not has_gold:
+                nexts.append(state | 2)
+            for nxt in nexts:
+                if cost + 1 < dist[nxt]:
+                    dist[nxt] = cost + 1
+                    if len(buckets) <= cost + 1:
+                        buckets.append([])
+                    buckets[cost + 1].append(nxt)
+            if not killed and num_arrows > 0 and fire[pose]:
+                nxt = state | 1
+                if cost + 11 < dist[nxt]:
+                    dist[nxt] = cost + 11
+                    while len(buckets) <= cost + 11:
+                        buckets.append([])
+                    buckets[cost + 11].append(nxt)
+        cost += 1
+
+    return -1
+
+
+def env_best_score(env):
+    """best_score for an Environment's layout and limits."""
+    pits, wumpus_pos, gold_pos = env.layout()
+    return best_score(env.grid_size, pits, wumpus_pos, gold_pos, env.max_actions, env.num_arrows)
+
+
+def _seed_score(task):
+    seed, grid_size, pit_prob, max_actions = task
+    env = Environment(grid_size=grid_size, pit_prob=pit_prob, max_actions=max_actions, seed=seed)
+    return env_best_score(env)
+
+
+def oracle_scores(seeds, grid_size, pit_prob, max_actions, jobs=1):
+    """Oracle score for every seed, split across jobs worker processes."""
+    tasks = [(seed, grid_size, pit_prob, max_actions) for seed in seeds]
+    if jobs <= 1:
+        return [_seed_score(t) for t in tasks]
+    with Pool(jobs) as pool:
+        return pool.map(_seed_score, tasks, chunksize=max(1, len(tasks) // (jobs * 8)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-knowledge best scores for Wumpus worlds")
+    parser.add_argument("-g", "--grid_size", type=int, default=4,
+                        help="Grid size N (N x N world)")
+    parser.add_argument("-p", "--pit_prob", type=float, default=0.2,
+                        help="Pit probability")
+    parser.add_argument("-m", "--max_actions", type=int, default=100,
+                        help="Maximum number of actions per trial")
+    parser.add_argument("-s", "--seed", type=int, default=12345,
+                        help="First seed")
+    parser.add_argument("-n", "--num_worlds", type=int, default=1000,
+                        help="Number of consecutive seeds to score")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Worker processes")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    scores = oracle_scores(range(args.seed, args.seed + args.num_worlds), args.grid_size,
+                           args.pit_prob, args.max_actions, args.jobs)
+    elapsed = time.perf_counter() - t0
+
+    winnable = sum(1 for s in scores if s > 0)
+    print(f"Worlds scored: {len(scores)} in {elapsed:.2f} s ({len(scores) / elapsed:,.0f} worlds/s)")
+    print(f"Average oracle score: {sum(scores) / len(scores):.2f}")
+    print(f"Winnable worlds: {winnable / len(scores):.2%}")
+
+
+if __name__ == "__main__":
+    main()
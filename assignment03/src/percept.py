@@ -10,3 +10,30 @@ class Percept(Enum):
     GLITTER = auto()
     BUMP = auto()
     SCREAM = auto()
+
+
+# Bit-flag form of a percept set, for code that steps the world a lot and
+# would rather pass small ints around than build sets every step.
+STENCH_BIT = 1
+BREEZE_BIT = 2
+GLITTER_BIT = 4
+BUMP_BIT = 8
+SCREAM_BIT = 16
+
+PERCEPT_BITS = {
+    Percept.STENCH: STENCH_BIT,
+    Percept.BREEZE: BREEZE_BIT,
+    Percept.GLITTER: GLITTER_BIT,
+    Percept.BUMP: BUMP_BIT,
+    Percept.SCREAM: SCREAM_BIT,
+}
+
+# PERCEPT_SETS[bits] is the frozenset of percepts encoded by bits
+PERCEPT_SETS = [
+    frozenset(p for p, bit in PERCEPT_BITS.items() if bits & bit)
+    for bits in range(32)
+]
+
+
+def bits_to_percepts(bits):
+    return set(PERCEPT_SETS[bits])
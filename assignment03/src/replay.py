@@ -0,0 +1,69 @@
+# CS 452/552 - Assignment 3
+# Name: Benjamin Zignego
+
+import argparse
+
+from action import Action
+from environment import Environment
+from percept import PERCEPT_SETS
+from trajectory import FORFEITED, TrajectoryReader
+
+DIR_NAMES = ["EAST", "NORTH", "WEST", "SOUTH"]
+
+
+def percept_names(bits):
+    return ",".join(sorted(p.name for p in PERCEPT_SETS[bits])) or "-"
+
+
+def replay_trial(rec, verbosity=1):
+    """
+    Step a fresh Environment through the recorded actions and check the percepts match.
+    Returns the replayed final score.
+    """
+    env = Environment(grid_size=rec.grid_size, max_actions=rec.max_actions,
+                      num_arrows=rec.num_arrows, layout=rec.layout())
+
+    if verbosity > 0:
+        print(f"Seed {rec.seed}, {rec.grid_size}x{rec.grid_size}, {len(rec.steps)} steps")
+        print(f"  Pits: {sorted(rec.pits)}")
+        print(f"  Wumpus: {rec.wumpus_pos}  Gold: {rec.gold_pos}")
+        print(f"  start: pos={env.agent_pos} dir={DIR_NAMES[env.agent_dir]} "
+              f"percepts={percept_names(rec.initial_percepts)}")
+
+    for i, (code, recorded) in enumerate(zip(rec.actions(), rec.percepts())):
+        bits, _ = env.step_code(code)
+        if verbosity > 0:
+            print(f"  {i + 1:5d}: {Action(code).name:<12} pos={env.agent_pos} "
+                  f"dir={DIR_NAMES[env.agent_dir]:<5} percepts={percept_names(bits)}")
+        if bits != recorded:
+            print(f"  warning: step {i + 1} percepts differ from the recording "
+                  f"({percept_names(recorded)})")
+
+    if rec.flags & FORFEITED:
+        env.forfeit()
+    return env.score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay trials recorded by ww_driver.py --record")
+    parser.add_argument("file", help="trajectory file")
+    parser.add_argument("-i", "--index", type=int, default=None,
+                        help="Trial to replay step by step (default: list all trials)")
+    args = parser.parse_args()
+
+    reader = TrajectoryReader(args.file)
+    if args.index is None:
+        print(f"{len(reader)} trials")
+        for i, rec in enumerate(reader):
+            forfeit = " (forfeit)" if rec.flags & FORFEITED else ""
+            print(f"{i:6d}: seed={rec.seed} N={rec.grid_size} steps={len(rec.steps)} "
+                  f"score={rec.score}{forfeit}")
+    else:
+        rec = reader[args.index]
+        score = replay_trial(rec)
+        print(f"Recorded score: {rec.score}  Replayed score: {score}")
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# CS 452/552 - Assignment 3
+# Name: Benjamin Zignego
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+from multiprocessing import Pool
+
+from ww_driver import run_trial
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Files whose contents decide what the agent does; editing any of them invalidates its results
+AGENT_SOURCES = ["my_agent.py", "agent.py", "inference.py", "bitboard.py", "action.py", "percept.py"]
+# Files that decide what the world does with those actions
+WORLD_SOURCES = ["environment.py", "ww_driver.py"]
+
+
+def source_hash(names):
+    h = hashlib.sha256()
+    for name in names:
+        with open(os.path.join(SRC_DIR, name), "rb") as f:
+            h.update(name.encode())
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def config_key(config, world_hash):
+    grid_size, pit_prob, max_actions = config
+    return f"g{grid_size}_p{pit_prob}_m{max_actions}_w{world_hash}"
+
+
+class ResultCache:
+    """
+    Trial results on disk: <cache dir>/<agent hash>/<config key>.json, each a
+    {seed: [score, steps, won]} map. Changing the agent only starts a new directory;
+    changing one config only touches that config's file.
+    """
+
+    def __init__(self, cache_dir, agent_hash):
+        self.dir = os.path.join(cache_dir, agent_hash)
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.dir, key + ".json")
+
+    def load(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return {int(seed): tuple(res) for seed, res in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def save(self, key, results):
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({str(seed): list(res) for seed, res in sorted(results.items())}, f)
+        os.replace(tmp, self._path(key))
+
+
+def run_one(task):
+    """Worker: one (config, seed) cell -> (score, steps, won)."""
+    (grid_size, pit_prob, max_actions), seed = task
+    args = argparse.Namespace(grid_size=grid_size, pit_prob=pit_prob, max_actions=max_actions,
+                              seed=seed, verbosity=0, time_limit=0, on_overrun="noop", lazy=False)
+    result = run_trial(args)
+    return result.score, result.steps, result.won
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep ww_driver over a grid of configurations, "
+                                                 "caching every (agent, config, seed) result")
+    parser.add_argument("-g", "--grid_size", type=int, nargs="+", default=[4],
+                        help="Grid sizes to sweep")
+    parser.add_argument("-p", "--pit_prob", type=float, nargs="+", default=[0.2],
+                        help="Pit probabilities to sweep")
+    parser.add_argument("-m", "--max_actions", type=int, nargs="+", default=[100],
+                        help="Action limits to sweep")
+    parser.add_argument("-c", "--config", default=None,
+                        help="JSON file with grid_size / pit_prob / max_actions lists "
+                             "(overrides the flags above)")
+    parser.add_argument("-s", "--seed", type=int, default=12345,
+                        help="First seed")
+    parser.add_argument("-n", "--num_seeds", type=int, default=100,
+                        help="Seeds per configuration")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Worker processes for trials that aren't cached")
+    parser.add_argument("--cache_dir", default=os.path.join(SRC_DIR, ".sweep_cache"),
+                        help="Where cached results live")
+    args = parser.parse_args()
+
+    grid = {"grid_size": args.grid_size, "pit_prob": args.pit_prob, "max_actions": args.max_actions}
+    if args.config:
+        with open(args.config) as f:
+            grid.update(json.load(f))
+    configs = list(itertools.product(grid["grid_size"], grid["pit_prob"], grid["max_actions"]))
+    seeds = range(args.seed, args.seed + args.num_seeds)
+
+    agent_hash = source_hash(AGENT_SOURCES)
+    world_hash = source_hash(WORLD_SOURCES)
+    cache = ResultCache(args.cache_dir, agent_hash)
+
+    results = {}
+    todo = []
+    for config in configs:
+        results[config] = cache.load(config_key(config, world_hash))
+        todo.extend((config, seed) for seed in seeds if seed not in results[config])
+
+    if todo:
+        if args.jobs > 1:
+            with Pool(args.jobs) as pool:
+                computed = pool.map(run_one, todo, chunksize=max(1, len(todo) // (args.jobs * 8)))
+        else:
+            computed = [run_one(task) for task in todo]
+        for (config, seed), res in zip(todo, computed):
+            results[config][seed] = res
+        for config in {config for config, _ in todo}:
+            cache.save(config_key(config, world_hash), results[config])
+
+    print(f"Agent {agent_hash}, world {world_hash}: {len(todo)} trials run, "
+          f"{len(configs) * len(seeds) - len(todo)} from cache")
+    print(f"{'grid':>5} {'pit_prob':>9} {'max_act':>8} {'seeds':>6} {'mean score':>11} {'win rate':>9}")
+    for config in configs:
+        rows = [results[config][seed] for seed in seeds]
+        mean = sum(r[0] for r in rows) / len(rows)
+        win_rate = sum(r[2] for r in rows) / len(rows)
+        grid_size, pit_prob, max_actions = config
+        print(f"{grid_size:>5} {pit_prob:>9} {max_actions:>8} {len(rows):>6} {mean:>11.2f} {win_rate:>9.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# CS 452/552 - Assignment 3
+# Name: Benjamin Zignego
+
+import os
+import struct
+
+from bitboard import iter_bits
+
+# File layout:
+#   MAGIC, then one record per trial, back to back. Every record is
+#   <I record length (bytes after this field)>
+#   HEADER: seed, grid size, max actions, arrows, final score, flags, wumpus cell, gold cell, steps
+#   pit bitmap: bit x * N + y set if (x, y) has a pit, (N * N + 7) // 8 bytes
+#   initial percept bits (1 byte)
+#   one byte per step: action code (Action.value, 3 bits) << 5 | percept bits (5 bits)
+# A sidecar "<path>.idx" holds the <Q byte offset of every record so a trial can be
+# found by index without reading the ones before it.
+MAGIC = b"WWTRAJ1\n"
+HEADER = struct.Struct("<qHIBiBIII")
+LENGTH = struct.Struct("<I")
+OFFSET = struct.Struct("<Q")
+
+FORFEITED = 1  # flags bit: the trial was forfeited on a time limit overrun
+
+
+class TrialRecord:
+    """One recorded trial, as read back from a trajectory file."""
+
+    __slots__ = ("seed", "grid_size", "max_actions", "num_arrows", "score", "flags",
+                 "pits", "wumpus_pos", "gold_pos", "initial_percepts", "steps")
+
+    def layout(self):
+        """(pits, wumpus_pos, gold_pos), ready for Environment(layout=...)."""
+        return self.pits, self.wumpus_pos, self.gold_pos
+
+    def actions(self):
+        """Action codes (Action.value), one per step."""
+        return [b >> 5 for b in self.steps]
+
+    def percepts(self):
+        """Percept bits seen after each step."""
+        return [b & 31 for b in self.steps]
+
+
+def pack_step(code, percept_bits):
+    return (code << 5) | percept_bits
+
+
+def scan_offsets(f, size):
+    """Offsets of every record in an open trajectory file, found by walking the record lengths."""
+    offsets = []
+    pos = len(MAGIC)
+    while pos < size:
+        offsets.append(pos)
+        f.seek(pos)
+        (length,) = LENGTH.unpack(f.read(LENGTH.size))
+        pos += LENGTH.size + length
+    return offsets
+
+
+class TrajectoryWriter:
+    """Appends trials to a trajectory file (and its index)."""
+
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            self._repair_index()
+        self.data = open(path, "ab")
+        self.index = open(path + ".idx", "ab")
+        if new:
+            self.data.write(MAGIC)
+
+    def _repair_index(self):
+        # Appending to an existing file: the index has to cover the records already there,
+        # or readers trusting it would never see them (e.g. the .idx wasn't copied along)
+        idx_path = self.path + ".idx"
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a trajectory file")
+            offsets = scan_offsets(f, os.path.getsize(self.path))
+        raw = b"".join(OFFSET.pack(o) for o in offsets)
+        if os.path.exists(idx_path):
+            with open(idx_path, "rb") as f:
+                if f.read() == raw:
+                    return
+        with open(idx_path, "wb") as f:
+            f.write(raw)
+
+    def write_trial(self, seed, env, initial_percepts, steps, flags=0):
+        """
+        :param env: the Environment after the trial (its layout and final score are stored)
+        :param initial_percepts: percept bits before the first action
+        :param steps: bytearray of pack_step() values
+        """
+        N = env.grid_size
+        pits, (wx, wy), (gx, gy) = env.layout()
+        bitmap = 0
+        for (x, y) in pits:
+            bitmap |= 1 << (x * N + y)
+        pit_bytes = bitmap.to_bytes((N * N + 7) // 8, "little")
+
+        header = HEADER.pack(seed, N, env.max_actions, env.num_arrows, env.score, flags,
+                             wx * N + wy, gx * N + gy, len(steps))
+        length = len(header) + len(pit_bytes) + 1 + len(steps)
+
+        self.index.write(OFFSET.pack(self.data.tell()))
+        self.data.write(LENGTH.pack(length))
+        self.data.write(header)
+        self.data.write(pit_bytes)
+        self.data.write(bytes((initial_percepts,)))
+        self.data.write(steps)
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class TrajectoryReader:
+    """Random access to the trials in a trajectory file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = open(path, "rb")
+        if self.data.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a trajectory file")
+        self.offsets = self._load_index()
+
+    def _load_index(self):
+        idx_path = self.path + ".idx"
+        if os.path.exists(idx_path):
+            with open(idx_path, "rb") as f:
+                raw = f.read()
+            return [o for (o,) in OFFSET.iter_unpack(raw)]
+
+        # No index (e.g. copied without it): walk the record lengths
+        return scan_offsets(self.data, os.path.getsize(self.path))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        self.data.seek(self.offsets[i])
+        (length,) = LENGTH.unpack(self.data.read(LENGTH.size))
+        buf = self.data.read(length)
+
+        rec = TrialRecord()
+        (rec.seed, N, rec.max_actions, rec.num_arrows, rec.score, rec.flags,
+         wumpus, gold, num_steps) = HEADER.unpack_from(buf)
+        rec.grid_size = N
+        rec.wumpus_pos = divmod(wumpus, N)
+        rec.gold_pos = divmod(gold, N)
+
+        pos = HEADER.size
+        pit_len = (N * N + 7) // 8
+        bitmap = int.from_bytes(buf[pos:pos + pit_len], "little")
+        pos += pit_len
+        rec.pits = frozenset(divmod(i, N) for i in iter_bits(bitmap))
+
+        rec.initial_percepts = buf[pos]
+        rec.steps = buf[pos + 1:pos + 1 + num_steps]
+        return rec
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        self.data.close()
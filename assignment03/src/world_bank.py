@@ -0,0 +1,113 @@
+# CS 452/552 - Assignment 3
+# Name: Benjamin Zignego
+
+import argparse
+import mmap
+import struct
+
+from environment import Environment
+
+# File layout: HEADER, then count fixed-size worlds of N * N bytes each.
+# Byte x * N + y of a world holds the PIT / WUMPUS / GOLD flags of cell (x, y).
+# Fixed-size records mean world i is just a slice of the mapping, so readers
+# (the driver, batch or parallel runners) can share one mmap without copying.
+MAGIC = b"WWBANK1\n"
+HEADER = struct.Struct("<8sHdqI")
+
+PIT = 1
+WUMPUS = 2
+GOLD = 4
+
+
+def encode_world(env):
+    N = env.grid_size
+    cells = bytearray(N * N)
+    for (x, y) in env.pits:
+        cells[x * N + y] |= PIT
+    wx, wy = env.wumpus_pos
+    cells[wx * N + wy] |= WUMPUS
+    gx, gy = env.gold_pos
+    cells[gx * N + gy] |= GOLD
+    return cells
+
+
+def build_bank(path, grid_size, pit_prob, start_seed, count):
+    """Generate the worlds for seeds start_seed .. start_seed + count - 1 into path."""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, grid_size, pit_prob, start_seed, count))
+        for seed in range(start_seed, start_seed + count):
+            env = Environment(grid_size=grid_size, pit_prob=pit_prob, seed=seed)
+            f.write(encode_world(env))
+
+
+class WorldBank:
+    """Read-only, memory-mapped view of a bank file built by build_bank."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.grid_size, self.pit_prob, self.start_seed, self.count = \
+            HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a world bank")
+        self.world_size = self.grid_size * self.grid_size
+        # Every world back to back; a zero-copy window onto the file
+        self.cells = memoryview(self._mmap)[HEADER.size:HEADER.size + self.count * self.world_size]
+
+    def __len__(self):
+        return self.count
+
+    def index_of(self, seed):
+        i = seed - self.start_seed
+        if not 0 <= i < self.count:
+            raise KeyError(f"seed {seed} is not in this bank "
+                           f"({self.start_seed}..{self.start_seed + self.count - 1})")
+        return i
+
+    def world(self, i):
+        """Cell flags of world i (a memoryview into the mapping, no copy)."""
+        start = i * self.world_size
+        return self.cells[start:start + self.world_size]
+
+    def layout(self, i):
+        """(pits, wumpus_pos, gold_pos) of world i, as Environment(layout=...) wants it."""
+        N = self.grid_size
+        pits = set()
+        wumpus = gold = None
+        for idx, flags in enumerate(self.world(i)):
+            if not flags:
+                continue
+            if flags & PIT:
+                pits.add(divmod(idx, N))
+            if flags & WUMPUS:
+                wumpus = divmod(idx, N)
+            if flags & GOLD:
+                gold = divmod(idx, N)
+        return pits, wumpus, gold
+
+    def close(self):
+        self.cells.release()
+        self._mmap.close()
+        self._file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate Wumpus worlds for a range of seeds")
+    parser.add_argument("file", help="bank file to write")
+    parser.add_argument("-g", "--grid_size", type=int, default=4,
+                        help="Grid size N (N x N world)")
+    parser.add_argument("-p", "--pit_prob", type=float, default=0.2,
+                        help="Pit probability")
+    parser.add_argument("-s", "--seed", type=int, default=12345,
+                        help="First seed")
+    parser.add_argument("-n", "--num_worlds", type=int, default=1000,
+                        help="Number of consecutive seeds to generate")
+    args = parser.parse_args()
+
+    build_bank(args.file, args.grid_size, args.pit_prob, args.seed, args.num_worlds)
+    print(f"Wrote {args.num_worlds} {args.grid_size}x{args.grid_size} worlds "
+          f"(seeds {args.seed}..{args.seed + args.num_worlds - 1}) to {args.file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,42 +2,166 @@
 # Name: Benjamin Zignego
 
 import argparse
+import math
+import os
+import sys
+import time
+from collections import namedtuple
 
+from action import Action
 from environment import Environment
 from my_agent import MyAgent
+from oracle import env_best_score
+from percept import bits_to_percepts
+from trajectory import FORFEITED, TrajectoryWriter, pack_step
+from world_bank import WorldBank
 
+# the shared --profile/--metrics layer lives at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import instrument
 
-def run_trial(args, seed_offset=0):
-    env = Environment(
-        grid_size=args.grid_size,
-        pit_prob=args.pit_prob,
-        max_actions=args.max_actions,
-        num_arrows=1,
-        seed=args.seed + seed_offset,
-        verbosity=args.verbosity,
-    )
+
+# won: climbed out of the cave holding the gold
+# oracle: best score possible with full knowledge of the world (None unless asked for)
+# latency: LatencyHistogram of the trial's per-decision times
+TrialResult = namedtuple("TrialResult", ["score", "steps", "latency", "overruns", "won", "oracle"],
+                         defaults=[None])
+
+
+class LatencyHistogram:
+    """Per-decision latencies (ms) as counts in fixed log-spaced buckets plus a running max.
+
+    Memory stays the same however many decisions are added. Bucket 0 holds everything under
+    LOW_MS; bucket i > 0 covers [LOW_MS * 10**((i-1)/PER_DECADE), LOW_MS * 10**(i/PER_DECADE)),
+    so a percentile is reported as its bucket's upper edge and is at most ~12% high (never
+    above the true max). The last bucket also takes anything past the top of the range.
+    """
+
+    LOW_MS = 0.001
+    PER_DECADE = 20
+    NUM_BUCKETS = 1 + 8 * PER_DECADE  # 1 us .. 100 s
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        if ms < self.LOW_MS:
+            i = 0
+        else:
+            i = min(self.NUM_BUCKETS - 1, int(math.log10(ms / self.LOW_MS) * self.PER_DECADE) + 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        """Nearest-rank percentile (q in 0..100), to bucket resolution."""
+        if not self.count:
+            return 0.0
+        rank = max(1, min(self.count, math.ceil(q / 100 * self.count)))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.max, self.LOW_MS * 10 ** (i / self.PER_DECADE))
+        return self.max
+
+    def summary(self):
+        """Format p50/p99/max."""
+        return (f"p50={self.percentile(50):.3f} ms, p99={self.percentile(99):.3f} ms, "
+                f"max={self.max:.3f} ms")
+
+
+def run_trial(args, seed_offset=0, recorder=None, bank=None, oracle=False):
+    seed = args.seed + seed_offset
+    if bank is not None:
+        env = Environment.from_bank(bank, bank.index_of(seed), max_actions=args.max_actions,
+                                    num_arrows=1, verbosity=args.verbosity)
+    else:
+        env = Environment(
+            grid_size=args.grid_size,
+            pit_prob=args.pit_prob,
+            max_actions=args.max_actions,
+            num_arrows=1,
+            seed=seed,
+            verbosity=args.verbosity,
+            lazy=args.lazy,
+        )
+
+    oracle_score = env_best_score(env) if oracle else None
 
     agent = MyAgent()
     agent.initialize(
         grid_size=args.grid_size,
         num_arrows=1,
         max_actions=args.max_actions,
+        pit_prob=args.pit_prob,
         verbosity=args.verbosity,
+        sparse=args.lazy,
     )
 
     done = False
-    percepts = env.get_percepts()
+    initial_bits = env.get_percept_bits()
+    percepts = bits_to_percepts(initial_bits)
     total_steps = 0
+    latency = LatencyHistogram()  # ms spent inside next_action per decision
+    overruns = 0
+    steps = bytearray()  # packed (action, percepts) per step, only kept when recording
+    flags = 0
+    won = False
+    env_time = 0.0  # seconds inside env.step_code
 
     while not done:
+        t0 = time.perf_counter()
         action = agent.next_action(percepts)
-        percepts, done = env.step(action)
+        elapsed = (time.perf_counter() - t0) * 1000
+        latency.add(elapsed)
+
+        if args.time_limit > 0 and elapsed > args.time_limit:
+            overruns += 1
+            if args.verbosity > 0:
+                print(f"[DRIVER] next_action took {elapsed:.3f} ms (limit {args.time_limit} ms)")
+            if args.on_overrun == "forfeit":
+                env.forfeit()
+                flags |= FORFEITED
+                total_steps += 1
+                break
+            # Too slow: the chosen action is dropped and the world just ticks
+            action = Action.NO_OP
+            agent.action_overridden(action)
+
+        t1 = time.perf_counter()
+        bits, done = env.step_code(action.value)
+        env_time += time.perf_counter() - t1
+        percepts = bits_to_percepts(bits)
+        if action == Action.CLIMB and done and env.agent_pos == (0, 0) and env.agent_has_gold:
+            won = True
+        if recorder is not None:
+            steps.append(pack_step(action.value, bits))
         total_steps += 1
 
+    if recorder is not None:
+        recorder.write_trial(seed, env, initial_bits, steps, flags)
+
     # Final percepts not needed; environment score is final
     score = env.score
     agent.game_over(score)
-    return score, total_steps
+    # action_count is the environment's own per-step counter
+    instrument.metrics.count(env_steps=env.action_count, decisions=latency.count, overruns=overruns)
+    instrument.metrics.add_time("agent_decision", latency.total / 1000)
+    instrument.metrics.add_time("env_step", env_time)
+    return TrialResult(score, total_steps, latency, overruns, won, oracle_score)
 
 
 def main():
@@ -50,25 +174,80 @@ def main():
                         help="Pit probability")
     parser.add_argument("-m", "--max_actions", type=int, default=10,
                         help="Maximum number of actions per trial")
-    parser.add_argument("-t", "--time_limit", type=int, default=3000,
-                        help="Time limit in ms (not enforced in this reference)")
+    parser.add_argument("-t", "--time_limit", type=float, default=3000,
+                        help="Time limit per action in ms (0 disables the limit)")
+    parser.add_argument("--on_overrun", choices=["noop", "forfeit"], default="noop",
+                        help="What happens when an action exceeds the time limit: "
+                             "replace it with NO_OP (the agent is told through "
+                             "Agent.action_overridden), or forfeit the trial")
     parser.add_argument("-n", "--num_trials", type=int, default=1,
                         help="Number of trials to run")
     parser.add_argument("-s", "--seed", type=int, default=12345,
                         help="Random seed")
+    parser.add_argument("-r", "--record", default=None,
+                        help="Append every trial (layout, actions, percepts) to this "
+                             "trajectory file; inspect it with replay.py")
+    parser.add_argument("-b", "--bank", default=None,
+                        help="Load worlds from a bank built by world_bank.py instead of "
+                             "generating them (grid size and pit prob come from the bank)")
+    parser.add_argument("-o", "--oracle", action="store_true",
+                        help="Also score every world with the full-knowledge oracle and report "
+                             "the agent's score as a fraction of it")
+    parser.add_argument("-z", "--lazy", action="store_true",
+                        help="Generate worlds lazily (pits hashed per cell on demand) and use "
+                             "the agent's sparse grid, for very large N; can't be combined "
+                             "with -r, -b or -o, which need the full layout")
+    instrument.add_arguments(parser)
 
     args = parser.parse_args()
+    if args.lazy and (args.record or args.bank or args.oracle):
+        parser.error("--lazy can't be combined with --record, --bank or --oracle")
+
+    with instrument.session(args, "wumpus"):
+        run(args, parser)
 
+
+def run(args, parser):
     scores = []
     steps = []
+    all_latency = LatencyHistogram()
+    total_overruns = 0
+    wins = 0
+    oracle_scores = []
+
+    recorder = TrajectoryWriter(args.record) if args.record else None
+    bank = None
+    if args.bank:
+        bank = WorldBank(args.bank)
+        args.grid_size = bank.grid_size
+        args.pit_prob = bank.pit_prob
+        last = bank.start_seed + len(bank) - 1
+        if args.seed < bank.start_seed or args.seed + args.num_trials - 1 > last:
+            parser.error(f"seeds {args.seed}..{args.seed + args.num_trials - 1} are not all in "
+                         f"the bank ({bank.start_seed}..{last})")
 
     for i in range(args.num_trials):
-        score, num_steps = run_trial(args, seed_offset=i)
-        scores.append(score)
-        steps.append(num_steps)
+        result = run_trial(args, seed_offset=i, recorder=recorder, bank=bank, oracle=args.oracle)
+        scores.append(result.score)
+        steps.append(result.steps)
+        all_latency.merge(result.latency)
+        total_overruns += result.overruns
+        wins += result.won
+        if args.oracle:
+            oracle_scores.append(result.oracle)
         if args.verbosity > 0:
-            print(f"Trial {i+1}: score={score}, steps={num_steps}")
+            print(f"Trial {i+1}: score={result.score}, steps={result.steps}, "
+                  f"overruns={result.overruns}, won={result.won}")
+            if args.oracle:
+                print(f"  oracle score: {result.oracle}")
+            print(f"  decision latency: {result.latency.summary()}")
+
+    if recorder is not None:
+        recorder.close()
+    if bank is not None:
+        bank.close()
 
+    instrument.metrics.count(trials=args.num_trials, wins=wins)
     avg_score = sum(scores) / len(scores)
     avg_steps = sum(steps) / len(steps)
 
@@ -76,6 +255,14 @@ def main():
     print(f"Trials run: {args.num_trials}")
     print(f"Average score: {avg_score:.2f}")
     print(f"Average steps: {avg_steps:.2f}")
+    print(f"Win rate: {wins / args.num_trials:.2%}")
+    if args.oracle:
+        oracle_total = sum(oracle_scores)
+        print(f"Average oracle score: {oracle_total / len(oracle_scores):.2f}")
+        if oracle_total > 0:
+            print(f"Agent score / oracle score: {sum(scores) / oracle_total:.2%}")
+    print(f"Decision latency: {all_latency.summary()}")
+    print(f"Time limit overruns: {total_overruns}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+# Benjamin Zignego
+# shared profiling and counters for the command line tools (assignment01/search.py,
+# assignment02/src/solve.py, assignment03/src/ww_driver.py)
+#
+# every tool gets the same two flags from add_arguments():
+#   --profile FILE   cProfile the whole run and write the stats (python -m pstats FILE)
+#   --metrics FILE   dump counters and timings as json
+# the counters live in the module level `metrics`. Hot loops count into plain local ints and
+# hand the totals over once when they finish, so having them on all the time costs next to
+# nothing. The tools live in separate assignment folders, so each one puts the repo root on
+# sys.path to import this file
+
+import cProfile
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Named counters (ints) and timings (seconds) for one run of a tool."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters = Counter()
+        self.timings = defaultdict(float)
+
+    def count(self, **counts):
+        for name, n in counts.items():
+            self.counters[name] += n
+
+    def add_time(self, name, seconds):
+        self.timings[name] += seconds
+
+    @contextmanager
+    def timer(self, name):
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - startTime
+
+    def as_dict(self):
+        return {"counters": dict(sorted(self.counters.items())),
+                "timings_s": {name: round(seconds, 6) for name, seconds in sorted(self.timings.items())}}
+
+
+metrics = Metrics()
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", metavar="FILE", help="write cProfile stats for the run to FILE (read them with python -m pstats FILE)")
+    parser.add_argument("--metrics", metavar="FILE", help="write counters and timings for the run to FILE as json")
+
+
+# wrap a tool's run: resets the counters, profiles if asked, and writes the files at the end
+# (even when the tool bails out early with sys.exit)
+@contextmanager
+def session(args, tool):
+    metrics.reset()
+    profiler = cProfile.Profile() if args.profile else None
+    startTime = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        metrics.add_time("total", time.perf_counter() - startTime)
+        if args.metrics:
+            with open(args.metrics, "w") as out:
+                json.dump({"tool": tool, **metrics.as_dict()}, out, indent=2)
+                out.write("\n")